@@ -0,0 +1 @@
+"""Modules of the Inter-College Festive Event ERP app. erp_app.py is the Streamlit entry point."""
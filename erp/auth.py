@@ -0,0 +1,126 @@
+"""Logins, password hashing and the signed session tokens kept in the URL."""
+import streamlit as st
+import json
+import base64
+import hashlib
+import hmac
+import secrets
+import bcrypt
+import time
+from typing import Optional
+
+from erp.directory import UserRecord
+from erp.runtime import SESSION_TOKEN_PARAM, user_directory
+from erp.pages import ROLE_PAGES
+from erp.pages.common import validate_input
+
+# --- Session Tokens ---
+# Signed, expiring tokens kept in the URL (query parameter), so a browser refresh or a reconnect logs the new
+# session back in with one HMAC check instead of another bcrypt login. Tokens carry a fingerprint of the
+# password hash, so changing a password revokes them.
+auth_config = st.secrets.auth if "auth" in st.secrets else {}
+SESSION_HOURS = auth_config.get("session_hours", 12)
+
+@st.cache_resource
+def get_session_secret():
+    """Returns the key signing session tokens: auth.session_secret, or a random key (tokens then end with the process)."""
+    return auth_config["session_secret"].encode('utf-8') if "session_secret" in auth_config else secrets.token_bytes(32)
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip("=")
+
+def _sign(body: str) -> str:
+    return _b64encode(hmac.new(get_session_secret(), body.encode('ascii'), hashlib.sha256).digest())
+
+def _password_fingerprint(password_hash: Optional[str]) -> str:
+    return hashlib.sha256((password_hash or "").encode('utf-8')).hexdigest()[:16]
+
+def issue_session_token(user: UserRecord) -> str:
+    """Returns a signed token for `user`, valid for SESSION_HOURS."""
+    payload = {"u": user.username, "exp": int(time.time() + SESSION_HOURS * 3600), "pw": _password_fingerprint(user.password)}
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode('utf-8'))
+    return f"{body}.{_sign(body)}"
+
+def verify_session_token(token: str):
+    """
+    Returns (UserRecord, expiry timestamp) for a valid token, or None if it is malformed, forged, expired,
+    or was issued before the user's password changed. Costs one HMAC and a directory lookup, no bcrypt.
+    """
+    try:
+        body, signature = token.split(".")
+        if not hmac.compare_digest(signature, _sign(body)):
+            return None
+        payload = json.loads(base64.urlsafe_b64decode(body + "=" * (-len(body) % 4)))
+    except (ValueError, TypeError, UnicodeError):
+        return None
+    if not isinstance(payload, dict) or not isinstance(payload.get("exp"), int) or payload["exp"] < time.time():
+        return None
+    user = user_directory().get(payload.get("u"))
+    if user is None or payload.get("pw") != _password_fingerprint(user.password):
+        return None
+    return user, payload["exp"]
+
+def start_session(user: UserRecord, issue_token: bool = True):
+    """Marks `user` as logged in for this session and, with `issue_token`, puts a fresh session token in the URL."""
+    st.session_state.logged_in = True
+    st.session_state.username = user.username
+    st.session_state.role = user.role
+    st.session_state.user_full_name = user.name
+    if issue_token:
+        st.query_params[SESSION_TOKEN_PARAM] = issue_session_token(user)
+
+def restore_session():
+    """Logs the session back in from the token in the URL, if it is valid. Tokens past half their lifetime are renewed."""
+    token = st.query_params.get(SESSION_TOKEN_PARAM)
+    if not token:
+        return
+    verified = verify_session_token(token)
+    if verified is None:
+        st.query_params.pop(SESSION_TOKEN_PARAM, None)
+        return
+    user, expires_at = verified
+    start_session(user, issue_token=expires_at - time.time() < SESSION_HOURS * 3600 / 2)
+
+
+# --- Logins ---
+def logout():
+    """Logs the user out by resetting session state variables."""
+    st.session_state.logged_in = False
+    st.session_state.username = None
+    st.session_state.role = None
+    st.session_state.user_full_name = None
+    st.session_state.current_page = "Home" # Redirect to home page after logout
+    st.query_params.pop(SESSION_TOKEN_PARAM, None) # The token in the URL would log the session back in
+    st.success("You have been logged out. 👋")
+    st.rerun() # Rerun to refresh the UI and show login form
+
+def hash_password(password: str) -> bytes:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+
+def verify_password(password: str, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed)
+
+def login(username: str, password: str):
+    """Authenticates the user and sets session state."""
+    # Validate inputs
+    if not validate_input(username, "Username") or not password:
+        st.error("Invalid username or password format 🚫")
+        return
+
+    # Check against the user directory (passwords are hashed)
+    directory = user_directory()
+    if len(directory) > 0:
+        user = directory.get(username)
+        if user is not None and user.password and verify_password(password, user.password.encode('utf-8')):
+            start_session(user)
+            
+            # Set the default page to the first accessible page for the role after login
+            accessible_pages_for_role = ROLE_PAGES.get(st.session_state.role, ["Home"])
+            st.session_state.current_page = accessible_pages_for_role[0] if accessible_pages_for_role else "Home"
+            
+            st.success(f"Welcome, {st.session_state.user_full_name} ({st.session_state.role})! 🎉")
+            st.rerun() # Rerun to refresh the UI and show role-specific navigation
+        else:
+            st.error("Invalid username or password 🚫")
+    else:
+        st.error("No user data loaded or malformed. Please check configuration.")
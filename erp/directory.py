@@ -0,0 +1,56 @@
+"""Shared index of the users table by username."""
+import streamlit as st
+import threading
+from typing import NamedTuple, Optional
+
+class UserRecord(NamedTuple):
+    """Compact record of one user, as served by the UserDirectory. Missing values are None."""
+    username: str
+    password: Optional[str]
+    role: Optional[str]
+    name: Optional[str]
+    email: Optional[str]
+    availability: Optional[str]
+    notification_mode: Optional[str]
+
+class UserDirectory:
+    """
+    Hash index of the users table by username, shared by all sessions. It is rebuilt only when it is
+    refreshed with a users table of another version, so lookups are O(1) dictionary hits in between.
+    """
+    COLUMNS = {"username": "Username", "password": "Password", "role": "Role", "name": "Name", "email": "Email",
+               "availability": "Availability", "notification_mode": "Notification Mode"}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._records = {}
+
+    def refresh(self, users_df):
+        """Rebuilds the index from `users_df` unless it was built from the same version of the table."""
+        version = users_df.attrs.get("version")
+        if version is not None and version == self._version:
+            return
+        records = {}
+        if not users_df.empty and "Username" in users_df.columns:
+            users = users_df.drop_duplicates(subset="Username") # The first row wins, as in a filtered lookup
+            users = users.reindex(columns=list(self.COLUMNS.values())).astype(object)
+            users = users.where(users.notna(), None)
+            records = {str(row[0]): UserRecord(*row) for row in users.itertuples(index=False, name=None)}
+        with self._lock:
+            self._records, self._version = records, version
+
+    def get(self, username):
+        """Returns the UserRecord of `username`, or None if there is no such user."""
+        return self._records.get(str(username)) if username is not None else None
+
+    def __contains__(self, username):
+        return self.get(username) is not None
+
+    def __len__(self):
+        return len(self._records)
+
+@st.cache_resource
+def get_user_directory():
+    """Returns the UserDirectory shared by the whole process."""
+    return UserDirectory()
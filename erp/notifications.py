@@ -0,0 +1,383 @@
+"""Notification emails: the background SMTP dispatcher, the digest outbox and the templates sent by the pages."""
+import streamlit as st
+import pandas as pd
+import smtplib
+from email.mime.text import MIMEText
+import sqlite3
+import threading
+import queue
+import collections
+import time
+import atexit
+
+from erp.storage import get_sqlite_connection
+from erp.runtime import db, user_directory
+
+# --- Email Helper Function ---
+class EmailDispatcher:
+    """
+    Background email sender. Messages are put on a bounded queue and sent by `workers` threads, each keeping
+    one persistent, authenticated SMTP connection (so the handshake, STARTTLS and login happen once per
+    connection rather than once per email). Failed sends are retried with exponential backoff, reconnecting first.
+
+    Bulk messages (one email per recipient, e.g. an event-wide announcement) are submitted as a job and sent
+    by a separate thread in batches of `batch_size`, one SMTP session per batch, so they don't hold up the
+    individual notifications. All sends share a limit of `max_per_minute` emails.
+    """
+    IDLE_CHECK_AFTER = 60 # Seconds after which an idle connection is checked with NOOP before reuse
+
+    def __init__(self, smtp_server, smtp_port, sender_email, sender_password, enable_tls,
+                 workers=2, max_queue=500, max_attempts=4, backoff=1.0, batch_size=50, max_per_minute=120):
+        self._smtp_server = smtp_server
+        self._smtp_port = smtp_port
+        self._sender_email = sender_email
+        self._sender_password = sender_password
+        self._enable_tls = enable_tls
+        self._max_attempts = max_attempts
+        self._backoff = backoff
+        self._batch_size = batch_size
+        self._max_per_minute = max_per_minute
+        self._recent_sends = collections.deque() # Send times within the last minute, for rate limiting
+        self._rate_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._bulk_jobs = queue.Queue()
+        self._jobs = {}
+        self._stats_lock = threading.Lock()
+        self._stats = {"sent": 0, "retried": 0, "failed": 0, "rejected": 0, "connections_opened": 0}
+        self._connections = [] # Every connection opened by the workers, closed at exit
+        for i in range(workers):
+            threading.Thread(target=self._run, name=f"email-dispatcher-{i}", daemon=True).start()
+        threading.Thread(target=self._run_bulk, name="email-dispatcher-bulk", daemon=True).start()
+        atexit.register(self.close)
+
+    def _message(self, recipient_email, subject, body):
+        msg = MIMEText(body)
+        msg['Subject'] = subject
+        msg['From'] = self._sender_email
+        msg['To'] = recipient_email
+        return msg
+
+    def submit(self, recipient_email, subject, body, on_done=None):
+        """
+        Queues an email. Returns False (without blocking) if the queue is full. `on_done`, if given, is called
+        from the worker thread with True once the email was sent, or False once all its attempts failed.
+        """
+        try:
+            self._queue.put_nowait((recipient_email, subject, self._message(recipient_email, subject, body), on_done))
+            return True
+        except queue.Full:
+            self._count("rejected")
+            return False
+
+    def submit_bulk(self, messages):
+        """Queues a bulk job sending each (recipient_email, subject, body) of `messages`. Returns the job ID."""
+        with self._stats_lock:
+            job_id = len(self._jobs) + 1
+            self._jobs[job_id] = {"total": len(messages), "sent": 0, "failed": 0, "done": False}
+        self._bulk_jobs.put((job_id, list(messages)))
+        return job_id
+
+    def job_status(self, job_id):
+        """Returns the progress of a bulk job as {"total", "sent", "failed", "done"}, or None for an unknown job."""
+        with self._stats_lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self):
+        """Returns the queue depth and delivery counters for monitoring."""
+        with self._stats_lock:
+            return dict(self._stats, queue_depth=self._queue.qsize())
+
+    def _count(self, stat):
+        with self._stats_lock:
+            self._stats[stat] += 1
+
+    def _connect(self):
+        server = smtplib.SMTP(self._smtp_server, self._smtp_port, timeout=30)
+        if self._enable_tls:
+            server.starttls()
+        server.login(self._sender_email, self._sender_password)
+        self._count("connections_opened")
+        self._connections.append(server)
+        return server
+
+    @staticmethod
+    def _is_alive(server):
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _disconnect(self, server):
+        if server in self._connections:
+            self._connections.remove(server)
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def _wait_for_rate_limit(self):
+        """Blocks until one more email fits in the per-minute limit, and records it."""
+        with self._rate_lock:
+            while True:
+                now = time.monotonic()
+                while self._recent_sends and now - self._recent_sends[0] >= 60:
+                    self._recent_sends.popleft()
+                if len(self._recent_sends) < self._max_per_minute:
+                    self._recent_sends.append(now)
+                    return
+                time.sleep(60 - (now - self._recent_sends[0]))
+
+    def _send(self, connection, recipient_email, subject, msg):
+        """
+        Sends `msg` over the calling thread's connection (`connection` holds it between calls), reconnecting
+        and retrying with exponential backoff on failure. Returns True if the email was sent.
+        """
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                server = connection.get("server")
+                if server is not None and time.monotonic() - connection["last_used"] > self.IDLE_CHECK_AFTER and not self._is_alive(server):
+                    self._disconnect(connection.pop("server"))
+                    server = None
+                if server is None:
+                    server = connection["server"] = self._connect()
+                    connection["last_used"] = time.monotonic()
+                self._wait_for_rate_limit()
+                server.sendmail(self._sender_email, recipient_email, msg.as_string())
+                connection["last_used"] = time.monotonic()
+                self._count("sent")
+                print(f"--- EMAIL SENT TO: {recipient_email} ---\nSubject: {subject}\n--- END EMAIL ---")
+                return True
+            except (smtplib.SMTPException, OSError) as e:
+                if connection.get("server") is not None:
+                    self._disconnect(connection.pop("server"))
+                if attempt == self._max_attempts:
+                    self._count("failed")
+                    print(f"--- FAILED EMAIL TO: {recipient_email} ---\nSubject: {subject}\nError: {e}\n\n{msg.get_payload()}\n--- END FAILED EMAIL ---")
+                else:
+                    self._count("retried")
+                    time.sleep(self._backoff * 2 ** (attempt - 1))
+        return False
+
+    def _run(self):
+        connection = {}
+        while True:
+            recipient_email, subject, msg, on_done = self._queue.get()
+            sent = self._send(connection, recipient_email, subject, msg)
+            if on_done is not None:
+                try:
+                    on_done(sent)
+                except Exception as e:
+                    print(f"--- EMAIL CALLBACK FAILED FOR: {recipient_email} ---\n{e}")
+            self._queue.task_done()
+
+    def _run_bulk(self):
+        while True:
+            job_id, messages = self._bulk_jobs.get()
+            for start in range(0, len(messages), self._batch_size):
+                connection = {} # One SMTP session per batch
+                for recipient_email, subject, body in messages[start:start + self._batch_size]:
+                    sent = self._send(connection, recipient_email, subject, self._message(recipient_email, subject, body))
+                    with self._stats_lock:
+                        self._jobs[job_id]["sent" if sent else "failed"] += 1
+                if connection.get("server") is not None:
+                    self._disconnect(connection["server"])
+            with self._stats_lock:
+                self._jobs[job_id]["done"] = True
+
+    def close(self):
+        """Closes the open SMTP connections. Emails still queued are not sent."""
+        for server in list(self._connections):
+            self._disconnect(server)
+
+@st.cache_resource
+def get_email_dispatcher(smtp_server, smtp_port, sender_email, _sender_password, enable_tls, max_per_minute):
+    """Creates the email dispatcher (and its worker threads) shared by all sessions sending through one SMTP account."""
+    return EmailDispatcher(smtp_server, smtp_port, sender_email, _sender_password, enable_tls, max_per_minute=max_per_minute)
+
+def email_dispatcher():
+    """Returns the shared email dispatcher, or None if the SMTP configuration in .streamlit/secrets.toml is incomplete."""
+    if "smtp" not in st.secrets or not all(
+        key in st.secrets.smtp for key in ["email_sender", "email_password", "smtp_server", "smtp_port", "enable_tls"]
+    ):
+        return None
+    return get_email_dispatcher(
+        st.secrets.smtp.smtp_server,
+        st.secrets.smtp.smtp_port,
+        st.secrets.smtp.email_sender,
+        st.secrets.smtp.email_password,
+        st.secrets.smtp.enable_tls,
+        st.secrets.smtp.get("max_per_minute", 120), # Provider's sending limit
+    )
+
+def send_email(recipient_email, subject, body):
+    """
+    Queues an email notification for background delivery and returns immediately.
+    Requires SMTP configuration in .streamlit/secrets.toml.
+    """
+    dispatcher = email_dispatcher()
+    if dispatcher is None:
+        st.warning(f"SMTP configuration incomplete. Email to '{recipient_email}' not sent.")
+        print(f"--- MOCK EMAIL TO: {recipient_email} ---\nSubject: {subject}\n\n{body}\n--- END MOCK EMAIL ---")
+        return
+
+    if dispatcher.submit(recipient_email, subject, body):
+        st.success(f"Email notification '{subject}' queued for {recipient_email}. 📧")
+    else:
+        st.warning(f"Email notification '{subject}' for {recipient_email} was not sent: the email queue is full. 📧")
+        print(f"--- EMAIL QUEUE FULL, DROPPED EMAIL TO: {recipient_email} ---\nSubject: {subject}\n\n{body}\n--- END DROPPED EMAIL ---")
+
+# Notification emails sent by the pages. "digest_line" is the entry listed for it in a digest email.
+NOTIFICATION_TEMPLATES = {
+    "task_added": {
+        "subject": "New Task Assignment for {event_name}",
+        "body": "Hello {name},\n\nYou have been assigned a new task for '{event_name}':\n\nTask: {task}\nDue Date: {due_date}\n\nPlease check the ERP system for more details.\n\nRegards,\n{sender} (Coordinator)",
+        "digest_line": "New task for '{event_name}': {task} (due {due_date}), from {sender}",
+    },
+    "task_assigned": {
+        "subject": "Your Task Assignment for {event_name}",
+        "body": "Hello {name},\n\nYou have been assigned a task for '{event_name}':\n\nTask: {task}\nDue Date: {due_date}\n\nPlease check the ERP system for more details.\n\nRegards,\n{sender} (Coordinator)",
+        "digest_line": "Task assigned for '{event_name}': {task} (due {due_date}), by {sender}",
+    },
+    "registration_confirmed": {
+        "subject": "Registration Confirmation for {event_name}",
+        "body": "Hello {name},\n\nThis is to confirm your registration for '{event_name}'.\n\nEvent Date: {event_date}\nEvent Location: {event_location}\n\nWe look forward to seeing you there!\n\nRegards,\nFestive Event Team",
+        "digest_line": "Registered for '{event_name}' on {event_date} at {event_location}",
+    },
+}
+DIGEST_SUBJECT = "Your Festive Event updates ({count})"
+DIGEST_BODY = "Hello {name},\n\nHere is what happened since your last update:\n\n{lines}\n\nPlease check the ERP system for more details.\n\nRegards,\nFestive Event Team"
+
+class NotificationOutbox:
+    """
+    Durable outbox of digest notifications, kept in a local SQLite file so pending entries survive restarts.
+    A background thread sends each recipient a single email listing all their pending entries once the
+    oldest one is `interval` seconds old, so nobody gets more than one digest per interval. Entries are only
+    marked sent once the dispatcher reports the digest delivered; if it fails or the process stops first,
+    they stay pending and go out with the next check.
+    """
+    CHECK_EVERY = 60 # Seconds between checks for due digests
+    KEEP_SENT_FOR = 30 * 86400 # Seconds sent entries are kept before being purged
+
+    def __init__(self, db_path, dispatcher=None, interval=86400):
+        self._connection, self._lock = get_sqlite_connection(db_path)
+        self._dispatcher = dispatcher # None if SMTP is not configured; digests are then only printed
+        self._interval = interval
+        self._in_flight = set() # Recipients whose digest is queued in the dispatcher
+        self._in_flight_lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT NOT NULL, "
+                "name TEXT, line TEXT NOT NULL, created_at REAL NOT NULL, sent_at REAL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (sent_at, email)")
+        threading.Thread(target=self._run, name="notification-digest", daemon=True).start()
+
+    def add(self, email, name, line):
+        """Records a notification for the next digest of `email`."""
+        with self._lock, self._connection:
+            self._connection.execute("INSERT INTO outbox (email, name, line, created_at) VALUES (?, ?, ?, ?)", (email, name, line, time.time()))
+
+    def pending_count(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM outbox WHERE sent_at IS NULL").fetchone()[0]
+
+    def send_due_digests(self):
+        """
+        Sends the digests that are due, except to recipients whose previous digest is still being delivered.
+        Entries whose digest could not be queued or delivered stay pending. Returns the number of digests sent or queued.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, email, name, line FROM outbox WHERE sent_at IS NULL AND email IN "
+                "(SELECT email FROM outbox WHERE sent_at IS NULL GROUP BY email HAVING MIN(created_at) <= ?) ORDER BY id",
+                (now - self._interval,)
+            ).fetchall()
+        with self._in_flight_lock:
+            rows = [row for row in rows if row[1] not in self._in_flight]
+        digests = {}
+        for entry_id, email, name, line in rows:
+            digest = digests.setdefault(email, {"name": name, "ids": [], "lines": []})
+            digest["ids"].append(entry_id)
+            digest["lines"].append(f"- {line}")
+
+        sent_ids, sent_digests = [], 0
+        for email, digest in digests.items():
+            subject = DIGEST_SUBJECT.format(count=len(digest["lines"]))
+            body = DIGEST_BODY.format(name=digest["name"], lines="\n".join(digest["lines"]))
+            if self._dispatcher is None:
+                print(f"--- MOCK DIGEST EMAIL TO: {email} ---\nSubject: {subject}\n\n{body}\n--- END MOCK EMAIL ---")
+                sent_ids.extend(digest["ids"])
+            else:
+                with self._in_flight_lock:
+                    self._in_flight.add(email)
+                on_done = lambda sent, email=email, ids=digest["ids"]: self._digest_done(email, ids, sent)
+                if not self._dispatcher.submit(email, subject, body, on_done=on_done):
+                    with self._in_flight_lock:
+                        self._in_flight.discard(email)
+                    continue # Email queue full: retried at the next check
+            sent_digests += 1
+
+        with self._lock, self._connection:
+            self._connection.executemany("UPDATE outbox SET sent_at = ? WHERE id = ?", [(now, entry_id) for entry_id in sent_ids])
+            self._connection.execute("DELETE FROM outbox WHERE sent_at < ?", (now - self.KEEP_SENT_FOR,))
+        return sent_digests
+
+    def _digest_done(self, email, entry_ids, sent):
+        """Called by the dispatcher once a digest was delivered (sent=True) or given up on; failed entries stay pending."""
+        try:
+            if sent:
+                with self._lock, self._connection:
+                    self._connection.executemany("UPDATE outbox SET sent_at = ? WHERE id = ?", [(time.time(), entry_id) for entry_id in entry_ids])
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.discard(email)
+
+    def _run(self):
+        while True:
+            time.sleep(self.CHECK_EVERY)
+            try:
+                self.send_due_digests()
+            except sqlite3.Error as e:
+                print(f"--- DIGEST CHECK FAILED ---\n{e}")
+
+@st.cache_resource
+def get_notification_outbox(db_path, interval, _dispatcher):
+    """Opens the digest outbox (and starts its sender thread) shared by all sessions."""
+    return NotificationOutbox(db_path, _dispatcher, interval)
+
+notifications_config = st.secrets.notifications if "notifications" in st.secrets else {}
+
+def notification_outbox():
+    """Returns the shared digest outbox, configured by the optional [notifications] section of the secrets."""
+    return get_notification_outbox(
+        notifications_config.get("outbox_path", "notification_outbox.db"),
+        notifications_config.get("digest_interval_hours", 24) * 3600,
+        email_dispatcher(),
+    )
+
+def notify(username, template_name, **fields):
+    """
+    Sends a user one of the NOTIFICATION_TEMPLATES, formatted with `fields` and the user's name: right away,
+    or as an entry of their next digest email if their Notification Mode is "Digest". Users without an email are skipped.
+    """
+    user = user_directory().get(username)
+    if user is None or not user.email or not user.email.strip():
+        return
+    email, name = user.email, user.name
+    mode = user.notification_mode or notifications_config.get("default_mode", "Immediate")
+
+    template = NOTIFICATION_TEMPLATES[template_name]
+    fields = dict(fields, name=name)
+    if mode == "Digest":
+        notification_outbox().add(email, name, template["digest_line"].format(**fields))
+        st.info(f"Notification for {username} added to their next digest email. 📬")
+    else:
+        send_email(email, template["subject"].format(**fields), template["body"].format(**fields))
+
+def update_notification_mode():
+    """Saves the notification mode picked in the sidebar to the logged-in user's profile."""
+    if st.session_state.username in user_directory():
+        updated_user = pd.DataFrame([{"Username": st.session_state.username, "Notification Mode": st.session_state.notification_mode_select}])
+        db.update_rows("users", "Username", updated_user, base_version=st.session_state.users_df.attrs.get("version")) # Save to storage
@@ -0,0 +1,84 @@
+"""Pages of the app by role, the tables each page reads, and the page registry."""
+import importlib
+import sys
+import time
+
+from erp.runtime import db
+
+# --- Role-based Page Mapping ---
+ROLE_PAGES = {
+    "Admin": ["Home", "Announcements", "Dashboard", "User Management", "Event Management", "Sponsor Management", "Budget Overview", "Reports"],
+    "Coordinator": ["Home", "Announcements", "My Events", "Event Task Management", "Volunteer Assignment", "Event Budget Tracking", "Communication Hub"],
+    "Participant": ["Home", "Announcements", "View Event Details", "Register for Events", "My Registrations"],
+    "Volunteer": ["Home", "Announcements", "My Tasks", "Update Availability"],
+    "Public": ["Home", "View Event Details", "Announcements"] # Pages visible when not logged in
+}
+
+# Tables each page reads, loaded before it runs; tables used only by some actions are loaded when needed
+PAGE_TABLES = {
+    "Home": [],
+    "Announcements": ["announcements"],
+    "Dashboard": ["events", "registrations", "volunteers", "announcements"],
+    "User Management": ["users"],
+    "Event Management": ["events", "users"],
+    "Sponsor Management": ["sponsors"],
+    "Budget Overview": ["events"],
+    "Reports": ["events", "sponsors", "volunteers"],
+    "My Events": ["events"],
+    "Event Task Management": ["events", "tasks", "users"],
+    "Volunteer Assignment": ["events", "tasks", "volunteers"],
+    "Event Budget Tracking": ["events"],
+    "Communication Hub": ["announcements", "events"],
+    "View Event Details": ["events"],
+    "Register for Events": ["events", "registrations"],
+    "My Registrations": ["events", "registrations"],
+    "My Tasks": ["events", "tasks"],
+    "Update Availability": ["users", "volunteers"],
+}
+
+def prefetch_tables(role):
+    """Warms the shared copies of the tables of every page `role` can open, so switching pages does not wait on the backend."""
+    db.read_sheets(sorted({sheet_name for page in ROLE_PAGES.get(role, []) for sheet_name in PAGE_TABLES.get(page, [])}))
+
+# Module (in erp.pages) and function drawing each page. A page module, and the heavy dependencies it imports
+# (bcrypt, SMTP), is only imported the first time one of its pages is opened.
+PAGE_FUNCTIONS = {
+    "Home": ("public", "home_page"),
+    "Announcements": ("public", "show_announcements"),
+    "View Event Details": ("public", "show_view_event_details"),
+    "Dashboard": ("admin", "show_admin_dashboard"),
+    "User Management": ("admin", "show_user_management"),
+    "Event Management": ("admin", "show_event_management"),
+    "Sponsor Management": ("admin", "show_sponsor_management"),
+    "Budget Overview": ("admin", "show_budget_overview"),
+    "Reports": ("admin", "show_reports"),
+    "My Events": ("coordinator", "show_my_events"),
+    "Event Task Management": ("coordinator", "show_event_task_management"),
+    "Volunteer Assignment": ("coordinator", "show_volunteer_assignment"),
+    "Event Budget Tracking": ("coordinator", "show_event_budget_tracking"),
+    "Communication Hub": ("coordinator", "show_communication_hub"),
+    "Register for Events": ("participant", "show_register_for_events"),
+    "My Registrations": ("participant", "show_my_registrations"),
+    "My Tasks": ("volunteer", "show_my_tasks"),
+    "Update Availability": ("volunteer", "show_update_availability"),
+}
+
+# Page registry: (role, page name) -> (module, function) for every page a role can open
+PAGE_REGISTRY = {(role, page): PAGE_FUNCTIONS[page] for role, pages in ROLE_PAGES.items() for page in pages}
+
+# Startup timings of this process in milliseconds: "cold_start" (the first run, which imports and opens
+# everything) and the first import of each page module, by module name
+startup_times = {}
+
+def page_function(role, page):
+    """Returns the function drawing `page` for `role`, importing its module on first use, or None if `role` has no such page."""
+    if (role, page) not in PAGE_REGISTRY:
+        return None
+    module_name, function_name = PAGE_REGISTRY[(role, page)]
+    module_name = f"{__name__}.{module_name}"
+    module = sys.modules.get(module_name)
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        startup_times.setdefault(module_name, (time.perf_counter() - started) * 1000)
+    return getattr(module, function_name)
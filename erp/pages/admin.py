@@ -0,0 +1,411 @@
+"""Admin pages: dashboard, user, event and sponsor management, budget overview and reports."""
+import streamlit as st
+import pandas as pd
+import datetime
+
+from erp.schema import AVAILABILITY_OPTIONS, EVENT_STATUSES, NOTIFICATION_MODES, ROLES, SPONSOR_TIERS
+from erp.runtime import db, google_db, user_directory
+from erp.notifications import email_dispatcher, notification_outbox
+from erp.auth import hash_password
+from erp.pages import startup_times
+from erp.pages.common import show_table_editor, validate_input
+
+def show_admin_dashboard():
+    """Admin Dashboard: Overview of events, participants, and budget."""
+    st.title("📊 Admin Dashboard")
+    st.markdown("---")
+    st.write(f"Welcome, {st.session_state.user_full_name}! Here's a quick overview of the system.")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Events", st.session_state.events_df.shape[0])
+    with col2:
+        st.metric("Total Participants", len(db.aggregate("registrations", "per_participant")))
+    with col3:
+        st.metric("Total Volunteers", st.session_state.volunteers_df.shape[0])
+    with col4:
+        st.metric("Total Budget Allocated", f"₹{db.total('events', 'budget'):,.2f}")
+
+    st.subheader("Upcoming Events 🗓️")
+    upcoming = st.session_state.events_df[st.session_state.events_df["Status"] == "Upcoming"].sort_values("Date") if not st.session_state.events_df.empty else pd.DataFrame()
+    if upcoming.empty:
+        st.info("No upcoming events.")
+    else:
+        st.dataframe(upcoming.head(5), use_container_width=True)
+
+    st.subheader("Recent Registrations 🧑‍🤝‍🧑")
+    registrations_per_day = db.aggregate("registrations", "per_day")
+    # Only the rows of the latest days holding the 5 most recent registrations are sorted
+    recent_days, recent_count = [], 0
+    for day in sorted(registrations_per_day, reverse=True):
+        if recent_count >= 5:
+            break
+        recent_days.append(day)
+        recent_count += registrations_per_day[day][0]
+    recent_regs = db.rows(st.session_state.registrations_df, "Registration Date", *recent_days)
+    if recent_regs.empty:
+        st.info("No recent registrations.")
+    else:
+        st.dataframe(recent_regs.sort_values("Registration Date", ascending=False).head(5), use_container_width=True)
+        st.bar_chart(pd.Series({day: count for day, (count, _) in registrations_per_day.items()}, name="Registrations").sort_index())
+
+    st.subheader("Recent Announcements 📣")
+    recent_announcements, _, _ = db.page(st.session_state.announcements_df, "Date Posted", limit=3)
+    if recent_announcements.empty:
+        st.info("No recent announcements.")
+    else:
+        for idx, row in recent_announcements.iterrows():
+            with st.expander(f"**{row['Title']}** - _Posted by {row['Author Username']} on {row['Date Posted']}_"):
+                st.write(row["Content"])
+
+    write_queue_stats = google_db.write_queue_stats() if google_db is not None else None
+    if write_queue_stats is not None:
+        st.subheader("Google Sheets Write Queue ⏳")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Pending Writes", write_queue_stats["queue_depth"])
+        with col2:
+            st.metric("Oldest Pending", f"{write_queue_stats['pending_age_ms'] / 1000:,.1f} s")
+        with col3:
+            st.metric("Last Flush", f"{write_queue_stats['last_flush_ms']:,.0f} ms", help=f"Average: {write_queue_stats['avg_flush_ms']:,.0f} ms over {write_queue_stats['flushes']} flushes")
+        with col4:
+            st.metric("Failed Writes", write_queue_stats["writes_failed"])
+        for lost in reversed(write_queue_stats["lost_writes"]):
+            lost_at = datetime.datetime.fromtimestamp(lost["at"]).strftime("%Y-%m-%d %H:%M:%S")
+            st.error(f"{lost_at}: a change to '{lost['sheet_name']}' ({lost['method']}) could not be saved to Google Sheets "
+                     f"and was dropped after {lost['attempts']} attempts: {lost['error']}. The table was reloaded from the sheet; please redo the change.")
+
+    dispatcher = email_dispatcher()
+    if dispatcher is not None:
+        email_stats = dispatcher.stats()
+        st.subheader("Email Dispatcher 📧")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Queued Emails", email_stats["queue_depth"])
+        with col2:
+            st.metric("Sent", email_stats["sent"], help=f"SMTP connections opened: {email_stats['connections_opened']}")
+        with col3:
+            st.metric("Retries", email_stats["retried"])
+        with col4:
+            st.metric("Failed / Dropped", email_stats["failed"] + email_stats["rejected"])
+        st.caption(f"Digest outbox: {notification_outbox().pending_count()} notification(s) waiting for the next digests.")
+
+    if "cold_start" in startup_times:
+        st.subheader("App Startup ⏱️")
+        page_imports = {name.rsplit(".", 1)[-1]: ms for name, ms in startup_times.items() if name != "cold_start"}
+        st.metric("Cold Start", f"{startup_times['cold_start']:,.0f} ms", help="Duration of the first run of this server process, which imports the app's modules and opens the storage backend.")
+        st.caption("First import of each page module: " + ", ".join(f"{name} {ms:,.0f} ms" for name, ms in page_imports.items()))
+
+def show_user_management():
+    """Admin User Management: Add/view/edit users."""
+    st.title("👤 User Management")
+    st.markdown("---")
+    st.write("Manage system users, their roles, and basic profiles.")
+
+    users_df = st.session_state.users_df
+    st.subheader("Existing System Users")
+    
+    if users_df.empty or "Username" not in users_df.columns:
+        st.info("No users in the system.")
+    else:
+        show_table_editor(
+            "users", "User details updated successfully! ✅",
+            column_config={
+                "Role": st.column_config.SelectboxColumn(options=ROLES),
+                "Availability": st.column_config.SelectboxColumn(options=AVAILABILITY_OPTIONS),
+                "Notification Mode": st.column_config.SelectboxColumn(options=NOTIFICATION_MODES),
+                "Email": st.column_config.TextColumn()
+            },
+            hidden_columns=["Password"] # Don't show passwords
+        )
+
+    st.subheader("Add New User ➕")
+    with st.expander("Expand to Add New User"):
+        with st.form("add_user_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                new_username = st.text_input("New Username (unique)")
+                new_password = st.text_input("Password", type="password")
+            with col2:
+                new_name = st.text_input("Full Name")
+                new_email = st.text_input("Email")
+                new_role = st.selectbox("Role", options=ROLES)
+            
+            submit_button = st.form_submit_button("Add User")
+
+            if submit_button:
+                if not all([
+                    validate_input(new_username, "Username"),
+                    validate_input(new_name, "Full Name"),
+                    validate_input(new_email, "Email", allow_special=True),
+                    new_password
+                ]):
+                    st.error("Please correct the input fields.")
+                elif new_username in user_directory():
+                    st.error("Username already exists! Please choose a different one.")
+                else:
+                    new_user_entry = {
+                        "Username": new_username, 
+                        "Password": hash_password(new_password).decode('utf-8'), # Hash password
+                        "Role": new_role, 
+                        "Name": new_name,
+                        "Email": new_email,
+                        "Availability": "Available" if new_role == "Volunteer" else "N/A" # Default for volunteers
+                    }
+                    db.append_rows("users", pd.DataFrame([new_user_entry])) # Save to storage
+
+                    if new_role == "Volunteer":
+                        new_volunteer_profile = {
+                            "Volunteer Username": new_username,
+                            "Full Name": new_name,
+                            "Availability": new_user_entry["Availability"] # Use the same availability as from user entry
+                        }
+                        db.append_rows("volunteers", pd.DataFrame([new_volunteer_profile]))
+
+                    st.success(f"User '{new_username}' added with role '{new_role}'. ✅")
+                    st.rerun() 
+
+def show_event_management():
+    """Admin Event Management: Create, view, and edit events."""
+    st.title("📅 Event Management")
+    st.markdown("---")
+    st.write("Create, view, and manage all festive events.")
+
+    tab1, tab2 = st.tabs(["View All Events", "Create New Event"])
+
+    with tab1:
+        st.subheader("All Events 📋")
+        if st.session_state.events_df.empty:
+            st.info("No events created yet.")
+        else:
+            show_table_editor(
+                "events", "Events updated successfully! ✅",
+                column_config={
+                    "Description": st.column_config.Column(width="medium"),
+                    "Budget": st.column_config.NumberColumn(format="₹%,.2f"),
+                    "Date": st.column_config.DateColumn(format="YYYY/MM/DD"),
+                    "Status": st.column_config.SelectboxColumn(options=EVENT_STATUSES)
+                }
+            )
+
+    with tab2:
+        st.subheader("Create New Event ✨")
+        with st.form("new_event_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                event_id = st.text_input("Event ID (e.g., E004)", help="Must be unique")
+                name = st.text_input("Event Name")
+                date = st.date_input("Date", datetime.date.today())
+                time = st.text_input("Time (e.g., 10:00 AM)")
+            with col2:
+                location = st.text_input("Location")
+                # Filter for actual coordinators from users_df, add an empty option
+                coordinator_names = st.session_state.users_df[st.session_state.users_df["Role"] == "Coordinator"]["Name"].tolist() if not st.session_state.users_df.empty else []
+                coordinator_options = [""] + coordinator_names
+                coordinator = st.selectbox("Coordinator", options=coordinator_options)
+                budget = st.number_input("Budget", min_value=0, value=10000, step=1000)
+                status = st.selectbox("Status", options=EVENT_STATUSES)
+            
+            description = st.text_area("Event Description", height=100)
+            
+            submit_event = st.form_submit_button("Add Event")
+
+            if submit_event:
+                if event_id in st.session_state.events_df["Event ID"].values:
+                    st.error("Event ID already exists! Please choose a unique ID.")
+                elif not event_id or not validate_input(name, "Event Name") or not location or not coordinator:
+                    st.error("Please fill in all required fields (Event ID, Name, Location, Coordinator).")
+                else:
+                    new_event = {
+                        "Event ID": event_id,
+                        "Name": name,
+                        "Date": date,
+                        "Time": time,
+                        "Location": location,
+                        "Coordinator": coordinator,
+                        "Budget": budget,
+                        "Status": status,
+                        "Description": description
+                    }
+                    db.append_rows("events", pd.DataFrame([new_event])) # Save to storage
+                    st.success(f"Event '{name}' added successfully! 🎉")
+                    st.rerun()
+
+def show_sponsor_management():
+    """Admin Sponsor Management: Add, view, and edit sponsors."""
+    st.title("🤝 Sponsor Management")
+    st.markdown("---")
+    st.write("Manage event sponsors, their contact information, and contributions.")
+
+    tab1, tab2 = st.tabs(["View All Sponsors", "Add New Sponsor"])
+
+    with tab1:
+        st.subheader("All Sponsors 💰")
+        if st.session_state.sponsors_df.empty:
+            st.info("No sponsors added yet.")
+        else:
+            show_table_editor(
+                "sponsors", "Sponsor details updated successfully! ✅",
+                column_config={
+                    "Contribution Amount": st.column_config.NumberColumn(format="₹%,.2f"),
+                    "Date Added": st.column_config.DateColumn(format="YYYY/MM/DD"),
+                    "Tier": st.column_config.SelectboxColumn(options=SPONSOR_TIERS)
+                }
+            )
+
+    with tab2:
+        st.subheader("Add New Sponsor 🌟")
+        with st.form("new_sponsor_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                sponsor_id = st.text_input("Sponsor ID (e.g., S002)", help="Must be unique")
+                name = st.text_input("Sponsor Name")
+                contact_person = st.text_input("Contact Person")
+            with col2:
+                contact_email = st.text_input("Contact Email")
+                contribution_amount = st.number_input("Contribution Amount", min_value=0, value=0, step=1000)
+                tier = st.selectbox("Sponsor Tier", options=SPONSOR_TIERS)
+            
+            submit_sponsor = st.form_submit_button("Add Sponsor")
+
+            if submit_sponsor:
+                if sponsor_id in st.session_state.sponsors_df["Sponsor ID"].values:
+                    st.error("Sponsor ID already exists! Please choose a unique ID.")
+                elif not sponsor_id or not validate_input(name, "Sponsor Name") or not validate_input(contact_person, "Contact Person") or not validate_input(contact_email, "Contact Email", allow_special=True):
+                    st.error("Please fill in all required fields.")
+                else:
+                    new_sponsor = {
+                        "Sponsor ID": sponsor_id,
+                        "Name": name,
+                        "Contact Person": contact_person,
+                        "Contact Email": contact_email,
+                        "Contribution Amount": contribution_amount,
+                        "Tier": tier,
+                        "Date Added": datetime.date.today()
+                    }
+                    db.append_rows("sponsors", pd.DataFrame([new_sponsor])) # Save to storage
+                    st.success(f"Sponsor '{name}' added successfully! 🎉")
+                    st.rerun()
+
+def show_budget_overview():
+    """Admin Budget Overview: Monitor overall budget and expenses."""
+    st.title("💰 Budget Overview")
+    st.markdown("---")
+    st.write("Monitor budget allocations and expenses across all events.")
+
+    total_allocated_budget = db.total("events", "budget")
+    total_sponsor_contributions = db.total("sponsors", "contributions")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Total Allocated Event Budget", f"₹{total_allocated_budget:,.2f}")
+    with col2:
+        st.metric("Total Sponsor Contributions", f"₹{total_sponsor_contributions:,.2f}")
+
+    st.subheader("Event-wise Budget Allocation 📊")
+    if st.session_state.events_df.empty:
+        st.info("No events with budget data.")
+    else:
+        st.dataframe(st.session_state.events_df[["Event ID", "Name", "Budget", "Status"]], use_container_width=True)
+        st.bar_chart(st.session_state.events_df.set_index("Name")["Budget"])
+
+    st.subheader("Overall Expenses (Conceptual) 📉")
+    st.warning("This section is conceptual. In a real ERP, integrate with actual financial tracking.")
+    if st.session_state.events_df.empty:
+        st.info("No events to track expenses for.")
+    else:
+        # Generate dummy expense data per event for visualization purposes
+        dummy_expenses = []
+        for _, event in st.session_state.events_df.iterrows():
+            # For demo, distribute a portion of budget as dummy expenses
+            if event["Budget"] > 0:
+                expense_amount = event["Budget"] * 0.3 # 30% of budget as dummy expense
+                dummy_expenses.append({
+                    "Event ID": event["Event ID"],
+                    "Category": "General Expenses",
+                    "Amount": expense_amount,
+                    "Date": datetime.date.today()
+                })
+        
+        if dummy_expenses:
+            expenses = pd.DataFrame(dummy_expenses)
+            st.dataframe(expenses, use_container_width=True)
+            
+            total_expenses_dummy = expenses["Amount"].sum()
+            st.metric("Total Expenses Recorded (Conceptual)", f"₹{total_expenses_dummy:,.2f}")
+            st.metric("Estimated Overall Balance", f"₹{total_allocated_budget + total_sponsor_contributions - total_expenses_dummy:,.2f}")
+        else:
+            st.info("No dummy expenses generated for events with a budget.")
+
+
+def show_reports():
+    """Admin Reports: Generate various analytical reports."""
+    st.title("📈 Reports")
+    st.markdown("---")
+    st.write("Generate various analytical reports for better event insights.")
+
+    report_type = st.selectbox("Select Report Type", ["Event Participation", "Budget vs Conceptual Expenses", "Volunteer Engagement", "Sponsor Contribution"])
+
+    if report_type == "Event Participation":
+        st.subheader("Event Participation Report 🧑‍🤝‍🧑")
+        registrations_per_event = db.aggregate("registrations", "per_event")
+        if not registrations_per_event:
+            st.info("No registrations to report on.")
+        else:
+            participation_counts = pd.DataFrame([(event_id, count) for event_id, (count, _) in registrations_per_event.items()], columns=["Event ID", "Participants"])
+            participation_merged = pd.merge(participation_counts, st.session_state.events_df[["Event ID", "Name"]], on="Event ID", how="left")
+            st.dataframe(participation_merged.sort_values("Participants", ascending=False), use_container_width=True)
+            st.bar_chart(participation_merged.set_index("Name")["Participants"])
+
+    elif report_type == "Budget vs Conceptual Expenses":
+        st.subheader("Budget vs Conceptual Expenses Report 💸")
+        st.warning("This report currently uses conceptual expense data. Integrate with actual expense tracking for real data.")
+        
+        if st.session_state.events_df.empty:
+            st.info("No events with budget data.")
+        else:
+            dummy_expenses = []
+            for _, event in st.session_state.events_df.iterrows():
+                if event["Budget"] > 0:
+                    expense_amount = event["Budget"] * 0.3
+                    dummy_expenses.append({
+                        "Event ID": event["Event ID"],
+                        "Amount": expense_amount
+                    })
+            
+            if dummy_expenses:
+                expenses_df = pd.DataFrame(dummy_expenses)
+                event_expenses = expenses_df.groupby("Event ID")["Amount"].sum().reset_index(name="Conceptual Expenses")
+                budget_vs_actual = pd.merge(st.session_state.events_df[["Event ID", "Name", "Budget"]], event_expenses, on="Event ID", how="left").fillna(0)
+                budget_vs_actual["Variance"] = budget_vs_actual["Budget"] - budget_vs_actual["Conceptual Expenses"]
+                st.dataframe(budget_vs_actual, use_container_width=True)
+                st.bar_chart(budget_vs_actual.set_index("Name")[["Budget", "Conceptual Expenses"]])
+            else:
+                st.info("No conceptual expenses to display for events.")
+
+
+    elif report_type == "Volunteer Engagement":
+        st.subheader("Volunteer Engagement Report 💪")
+        tasks_per_volunteer = db.aggregate("tasks", "per_volunteer")
+        if not tasks_per_volunteer:
+            st.info("No volunteer tasks assigned to report on.")
+        else:
+            volunteer_tasks_counts = pd.DataFrame([(username, count) for username, (count, _) in tasks_per_volunteer.items() if username], columns=["Volunteer Username", "Assigned Tasks"])
+            # Merge with full names for better display
+            volunteer_tasks_merged = pd.merge(volunteer_tasks_counts, st.session_state.volunteers_df[["Volunteer Username", "Full Name"]], on="Volunteer Username", how="left")
+            st.dataframe(volunteer_tasks_merged, use_container_width=True)
+            st.bar_chart(volunteer_tasks_merged.set_index("Full Name")["Assigned Tasks"])
+    
+    elif report_type == "Sponsor Contribution":
+        st.subheader("Sponsor Contribution Report 🌟")
+        if st.session_state.sponsors_df.empty:
+            st.info("No sponsors to report on.")
+        else:
+            st.dataframe(st.session_state.sponsors_df[["Name", "Tier", "Contribution Amount", "Contact Person"]], use_container_width=True)
+            st.bar_chart(st.session_state.sponsors_df.set_index("Name")["Contribution Amount"])
+
+            st.write("**Contributions by Tier**")
+            tier_totals = pd.DataFrame([(tier, count, total) for tier, (count, total) in db.aggregate("sponsors", "per_tier").items()],
+                                       columns=["Tier", "Sponsors", "Contribution Amount"])
+            st.dataframe(tier_totals, use_container_width=True)
+            st.bar_chart(tier_totals.set_index("Tier")["Contribution Amount"])
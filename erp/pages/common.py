@@ -0,0 +1,152 @@
+"""Helpers shared by the pages: input validation, recipients lookups, paginated views and table editors."""
+import streamlit as st
+import pandas as pd
+import re
+from typing import Optional
+
+from erp.schema import SHEET_PRIMARY_KEYS
+from erp.storage import ID_PREFIXES
+from erp.runtime import db, load_tables, refresh_tables, rerun_fragment, user_directory
+
+def validate_input(value: str, field_name: str, max_length: int = 100, allow_special: bool = False) -> Optional[str]:
+    """Validate and sanitize input strings."""
+    if not value:
+        return None
+    if len(value) > max_length:
+        st.error(f"{field_name} is too long (max {max_length} characters).")
+        return None
+    pattern = r'^[a-zA-Z0-9\s]+$' if not allow_special else r'^[a-zA-Z0-9\s@._-]+$'
+    if not re.match(pattern, value):
+        st.error(f"{field_name} contains invalid characters.")
+        return None
+    return value
+
+def event_recipients(event_ids):
+    """
+    Returns the participants registered for any of `event_ids` and the volunteers with a task on them, as a
+    DataFrame of Username, Name and Email with one row per email address (users without an email are skipped).
+    """
+    load_tables("registrations", "tasks")
+    registrations_df = st.session_state.registrations_df
+    tasks_df = st.session_state.tasks_df
+    usernames = []
+    if not registrations_df.empty:
+        usernames.append(db.rows(registrations_df, "Event ID", *event_ids)["Participant Username"])
+    if not tasks_df.empty:
+        usernames.append(db.rows(tasks_df, "Event ID", *event_ids)["Assigned To Volunteer Username"])
+    if not usernames:
+        return pd.DataFrame(columns=["Username", "Name", "Email"])
+
+    directory = user_directory()
+    users = (directory.get(username) for username in pd.concat(usernames).dropna().unique())
+    recipients = pd.DataFrame([(user.username, user.name, user.email) for user in users if user is not None],
+                              columns=["Username", "Name", "Email"])
+    emails = recipients["Email"].fillna("").str.strip().str.lower()
+    return recipients[(emails != "") & ~emails.duplicated()]
+
+# --- Shared Page Components ---
+
+ROWS_PER_PAGE = 10
+
+def show_paginated(state_key, df, column, render, filters=None, descending=True):
+    """
+    Renders the rows of `df` in `column` order with `render(rows)`, one page at a time: the first
+    ROWS_PER_PAGE rows, and a "Load more" button that extends the view by another page. The end of the view
+    is kept as a cursor in the session state under `state_key`, so only the rows shown are materialized.
+    Returns the rows shown.
+    """
+    end_cursor = st.session_state.get(state_key)
+    if end_cursor is None:
+        rows, end_cursor, more = db.page(df, column, limit=ROWS_PER_PAGE, filters=filters, descending=descending)
+    else:
+        rows, end_cursor, more = db.page(df, column, until=end_cursor, filters=filters, descending=descending)
+    if not rows.empty:
+        render(rows)
+    if more and st.button("Load more ⬇️", key=f"{state_key}_more"):
+        _, st.session_state[state_key], _ = db.page(df, column, limit=ROWS_PER_PAGE, after=end_cursor, filters=filters, descending=descending)
+        st.rerun()
+    return rows
+
+def _has_editor_changes(changes):
+    return any(changes.get(kind) for kind in ("edited_rows", "added_rows", "deleted_rows"))
+
+def save_editor_changes(sheet_name, editor_key, shown):
+    """
+    Saves the changes made in the st.data_editor `editor_key`. `shown` describes the rows of the shared copy of
+    `sheet_name` the editor was last drawn with: {"keys": their primary keys in order, "columns": the table's
+    columns, "version": the table version}. The editor reports the edited, added and deleted rows by position,
+    which are mapped to keys through `shown`; only the key and the edited cells of each row are written through
+    `db`, so the backend updates just those cells. Rows changed by someone else since that version are rejected.
+    Returns None if there are no changes, else the keys of the rows that were rejected.
+    """
+    changes = st.session_state.get(editor_key) or {}
+    if not _has_editor_changes(changes):
+        return None
+    edited_rows, added_rows, deleted_rows = (changes.get(kind) for kind in ("edited_rows", "added_rows", "deleted_rows"))
+    key_col = SHEET_PRIMARY_KEYS[sheet_name]
+    keys, base_version = shown["keys"], shown["version"]
+    rejected = set()
+    if edited_rows:
+        # One write per set of edited columns, so no row is sent with cells it did not change
+        rows_by_columns = {}
+        for position, cells in edited_rows.items():
+            cells = {col: value for col, value in cells.items() if col in shown["columns"] and col != key_col} # Rows are matched on their key, which is not editable
+            if cells:
+                rows_by_columns.setdefault(tuple(cells), []).append({key_col: keys[int(position)], **cells})
+        for rows in rows_by_columns.values():
+            rejected |= db.update_rows(sheet_name, key_col, pd.DataFrame(rows), base_version=base_version)
+    if added_rows:
+        rows = pd.DataFrame(added_rows).reindex(columns=shown["columns"])
+        if sheet_name in ID_PREFIXES:
+            rows[key_col] = [key if isinstance(key, str) and key else db.new_id(sheet_name) for key in rows[key_col]]
+        rejected |= db.append_rows(sheet_name, rows)
+    if deleted_rows:
+        rejected |= db.delete_rows(sheet_name, key_col, [keys[int(position)] for position in deleted_rows], base_version=base_version)
+    return rejected
+
+@st.fragment
+def show_table_editor(sheet_name, success_message, column_config, hidden_columns=(), filters=None):
+    """
+    An st.data_editor over the shared copy of `sheet_name` (the rows matching `filters`, column -> value), as a
+    fragment: an edit saves the edited rows and reruns only the editor, against the new version of the table.
+    The editor keeps its key while other sessions write to the table, so their changes don't discard pending
+    edits; it is only replaced by a fresh one after this session saved.
+    """
+    editor_name = "_".join([sheet_name, "editor", *map(str, (filters or {}).values())])
+    editor_key = f"{editor_name}_{st.session_state.get(f'{editor_name}_saves', 0)}"
+    # The editor's row positions refer to the rows it was drawn with in the previous run, which may no longer be
+    # the current ones: save against those, before refreshing
+    shown = st.session_state.get(f"{editor_key}_shown")
+    rejected = save_editor_changes(sheet_name, editor_key, shown) if shown is not None else None # Save only the edited cells
+    if rejected is not None:
+        if not rejected:
+            st.success(success_message)
+        # Saved edits come back as a new version of the table, shown in a fresh editor
+        st.session_state[f"{editor_name}_saves"] = st.session_state.get(f"{editor_name}_saves", 0) + 1
+        st.session_state.pop(f"{editor_key}_shown", None)
+        rerun_fragment()
+
+    refresh_tables(sheet_name)
+    shown_df = st.session_state[f"{sheet_name}_df"]
+    for col, value in (filters or {}).items():
+        shown_df = db.rows(shown_df, col, value)
+    key_col = SHEET_PRIMARY_KEYS[sheet_name]
+    st.session_state[f"{editor_key}_shown"] = {
+        "keys": shown_df[key_col].astype(str).tolist() if key_col in shown_df.columns else [],
+        "columns": list(shown_df.columns),
+        "version": shown_df.attrs.get("version"),
+    }
+    st.data_editor(
+        shown_df.drop(columns=list(hidden_columns), errors='ignore'),
+        key=editor_key,
+        use_container_width=True,
+        disabled=[key_col],
+        column_config=column_config
+    )
+
+def show_announcement_rows(announcements):
+    for idx, row in announcements.iterrows():
+        with st.expander(f"**{row['Title']}** - _Posted by {row['Author Username']} on {row['Date Posted']}_"):
+            st.write(row["Content"])
+            st.markdown(f"**Target Audience:** {row['Target Role']}")
+        st.markdown("---") # Separator between announcements
@@ -0,0 +1,314 @@
+"""Coordinator pages: their events, tasks, volunteer assignment, budget tracking and communication."""
+import streamlit as st
+import pandas as pd
+import datetime
+
+from erp.schema import EVENT_STATUSES, TASK_STATUSES
+from erp.runtime import db
+from erp.notifications import email_dispatcher, notify
+from erp.pages.common import event_recipients, show_announcement_rows, show_paginated, show_table_editor, validate_input
+
+def show_my_events():
+    """Coordinator: View and manage events assigned to them."""
+    st.title("My Events 🗓️")
+    st.markdown("---")
+    st.write(f"Events you are coordinating, {st.session_state.user_full_name}.")
+    
+    my_events = db.rows(st.session_state.events_df, "Coordinator", st.session_state.user_full_name)
+    if my_events.empty:
+        st.info("You are not currently assigned to coordinate any events.")
+    else:
+        st.dataframe(my_events[["Event ID", "Name", "Date", "Location", "Status"]], use_container_width=True)
+
+        st.subheader("Update Event Status 🔄")
+        with st.expander("Update Status for an Event"):
+            event_names = dict(zip(my_events["Event ID"], my_events["Name"]))
+            event_to_update_id = st.selectbox("Select Event to Update", 
+                                              options=my_events["Event ID"].tolist(), 
+                                              format_func=lambda x: event_names.get(x, x),
+                                              key="update_my_event_status_select")
+            
+            if event_to_update_id:
+                current_status = db.rows(st.session_state.events_df, "Event ID", event_to_update_id)["Status"].iloc[0]
+                new_status = st.selectbox("New Status", 
+                                          options=EVENT_STATUSES, 
+                                          index=EVENT_STATUSES.index(current_status), 
+                                          key=f"status_select_{event_to_update_id}")
+                
+                if st.button(f"Update Status for {event_to_update_id}", key=f"update_status_btn_{event_to_update_id}"):
+                    updated_event = db.rows(st.session_state.events_df, "Event ID", event_to_update_id).copy()
+                    updated_event["Status"] = new_status
+                    if not db.update_rows("events", "Event ID", updated_event): # Save to storage
+                        st.success(f"Status for {event_to_update_id} updated to {new_status}. ✅")
+                    st.rerun()
+
+def show_event_task_management():
+    """Coordinator: Define and manage tasks for their events."""
+    st.title("✅ Event Task Management")
+    st.markdown("---")
+    st.write(f"Manage tasks for events you coordinate, {st.session_state.user_full_name}.")
+
+    my_events_df = db.rows(st.session_state.events_df, "Coordinator", st.session_state.user_full_name)
+
+    if my_events_df.empty:
+        st.info("You are not coordinating any events to manage tasks for.")
+        return
+
+    event_names = dict(zip(my_events_df["Event ID"], my_events_df["Name"]))
+    selected_event_id = st.selectbox("Select Event", 
+                                      options=my_events_df["Event ID"].tolist(),
+                                      format_func=lambda x: event_names.get(x, x),
+                                      key="select_event_for_task_management")
+
+    if selected_event_id:
+        event_name = event_names[selected_event_id]
+        st.subheader(f"Tasks for: {event_name} ({selected_event_id}) 📝")
+
+        current_event_tasks = db.rows(st.session_state.tasks_df, "Event ID", selected_event_id)
+        
+        if current_event_tasks.empty:
+            st.info("No tasks defined for this event yet.")
+        else:
+            # Display and allow editing of existing tasks
+            # The editor only holds this event's tasks, and only the rows edited in it are saved
+            show_table_editor(
+                "tasks", "Tasks updated successfully! ✅",
+                column_config={
+                    "Due Date": st.column_config.DateColumn(format="YYYY/MM/DD"),
+                    "Status": st.column_config.SelectboxColumn(options=TASK_STATUSES)
+                },
+                filters={"Event ID": selected_event_id}
+            )
+
+        st.subheader("Add New Task ➕")
+        with st.expander(f"Add a new task for {event_name}"):
+            with st.form(f"add_task_form_{selected_event_id}"):
+                task_description = st.text_input("Task Description")
+                # Get volunteer usernames from users_df with role "Volunteer"
+                volunteer_usernames = st.session_state.users_df[st.session_state.users_df["Role"] == "Volunteer"]["Username"].tolist() if not st.session_state.users_df.empty else []
+                volunteer_options = [""] + volunteer_usernames
+                assigned_to_volunteer = st.selectbox("Assign to Volunteer (Optional)", options=volunteer_options)
+                due_date = st.date_input("Due Date", datetime.date.today())
+                task_status = st.selectbox("Initial Status", options=["Assigned", "Pending", "In Progress"])
+
+                add_task_button = st.form_submit_button("Add Task")
+
+                if add_task_button:
+                    if validate_input(task_description, "Task Description"):
+                        new_task_id = db.new_id("tasks")
+                        new_task = {
+                            "Task ID": new_task_id,
+                            "Event ID": selected_event_id,
+                            "Description": task_description,
+                            "Assigned To Volunteer Username": assigned_to_volunteer if assigned_to_volunteer else None,
+                            "Due Date": due_date,
+                            "Status": task_status,
+                            "Created By": st.session_state.username
+                        }
+                        db.append_rows("tasks", pd.DataFrame([new_task])) # Save to storage
+                        st.success(f"Task '{task_description}' added to '{event_name}'! ✅")
+
+                        if assigned_to_volunteer:
+                            notify(assigned_to_volunteer, "task_added", event_name=event_name, task=task_description,
+                                   due_date=due_date, sender=st.session_state.user_full_name)
+                        st.rerun()
+                    else:
+                        st.error("Task description cannot be empty or invalid.")
+
+def show_volunteer_assignment():
+    """Coordinator: Assign volunteers to tasks within their events."""
+    st.title("👥 Volunteer Assignment")
+    st.markdown("---")
+    st.write(f"Assign volunteers to tasks for events you coordinate, {st.session_state.user_full_name}.")
+
+    my_events_df = db.rows(st.session_state.events_df, "Coordinator", st.session_state.user_full_name)
+
+    if my_events_df.empty:
+        st.info("You are not coordinating any events to assign volunteers to.")
+        return
+
+    event_names = dict(zip(my_events_df["Event ID"], my_events_df["Name"]))
+    selected_event_id = st.selectbox("Select Event", options=my_events_df["Event ID"].tolist(),
+                                      format_func=lambda x: event_names.get(x, x),
+                                      key="select_event_for_volunteer_assignment")
+
+    if selected_event_id:
+        st.subheader(f"Volunteers and Tasks for {event_names[selected_event_id]}")
+        
+        current_event_tasks = db.rows(st.session_state.tasks_df, "Event ID", selected_event_id)
+        
+        if current_event_tasks.empty:
+            st.info("No tasks defined for this event yet. Please create tasks in 'Event Task Management' first.")
+        else:
+            # Display current assignments
+            def show_assignment_rows(tasks):
+                display_tasks = pd.merge(tasks, st.session_state.volunteers_df[["Volunteer Username", "Full Name", "Availability"]],
+                                         left_on="Assigned To Volunteer Username", right_on="Volunteer Username", how="left").fillna({"Full Name": "Unassigned", "Availability": "N/A"}) if not st.session_state.volunteers_df.empty else tasks
+                st.dataframe(display_tasks[["Description", "Full Name", "Availability", "Status", "Due Date"]], use_container_width=True)
+            show_paginated(f"assignment_tasks_cursor_{selected_event_id}", st.session_state.tasks_df, "Due Date", show_assignment_rows,
+                           filters={"Event ID": [selected_event_id]}, descending=False)
+
+            st.subheader("Assign/Reassign Task to Volunteer ✏️")
+            with st.expander("Assign/Reassign Task"):
+                with st.form(f"assign_task_form_{selected_event_id}"):
+                    task_options = [""] + current_event_tasks["Description"].tolist()
+                    selected_task_description = st.selectbox("Select Task", options=task_options)
+                    
+                    available_volunteers_df = st.session_state.volunteers_df[st.session_state.volunteers_df["Availability"] == "Available"] if not st.session_state.volunteers_df.empty else pd.DataFrame()
+                    volunteer_options = [""] + available_volunteers_df["Volunteer Username"].tolist()
+                    
+                    assigned_volunteer = st.selectbox("Assign To (Available Volunteers)", options=volunteer_options, help="Only 'Available' volunteers are shown.")
+                    
+                    assign_button = st.form_submit_button("Assign/Update Assignment")
+
+                    if assign_button:
+                        if selected_task_description:
+                            task_idx = db.rows(st.session_state.tasks_df, "Event ID", selected_event_id).loc[
+                                lambda tasks: tasks["Description"] == selected_task_description
+                            ].index
+                            
+                            if not task_idx.empty:
+                                # old_assigned_volunteer = st.session_state.tasks_df.loc[task_idx, "Assigned To Volunteer Username"].iloc[0] # Not directly used for logic
+                                
+                                updated_tasks = st.session_state.tasks_df.loc[task_idx].copy()
+                                if assigned_volunteer: # Assign or Reassign
+                                    updated_tasks["Assigned To Volunteer Username"] = assigned_volunteer
+                                    updated_tasks["Status"] = "Assigned" # Update status to Assigned
+                                    if not db.update_rows("tasks", "Task ID", updated_tasks): # Save to storage
+                                        st.success(f"Task '{selected_task_description}' assigned to '{assigned_volunteer}'. ✅")
+                                    
+                                        # Notify the assigned volunteer
+                                        event_full_name = event_names[selected_event_id]
+                                        notify(assigned_volunteer, "task_assigned", event_name=event_full_name, task=selected_task_description,
+                                               due_date=updated_tasks['Due Date'].iloc[0], sender=st.session_state.user_full_name)
+                                else: # Unassign
+                                    updated_tasks["Assigned To Volunteer Username"] = None
+                                    updated_tasks["Status"] = "Pending" # Update status to Pending
+                                    if not db.update_rows("tasks", "Task ID", updated_tasks): # Save to storage
+                                        st.info(f"Task '{selected_task_description}' unassigned. It is now 'Pending'.")
+
+                                st.rerun()
+                            else:
+                                st.error("Selected task not found.")
+                        else:
+                            st.error("Please select a task.")
+
+def show_event_budget_tracking():
+    """Coordinator: Track budget and conceptual expenses for their assigned events."""
+    st.title("💸 Event Budget Tracking")
+    st.markdown("---")
+    st.write(f"Track the budget for events you coordinate, {st.session_state.user_full_name}.")
+
+    my_events_df = db.rows(st.session_state.events_df, "Coordinator", st.session_state.user_full_name)
+    
+    if my_events_df.empty:
+        st.info("You are not coordinating any events to track budget for.")
+        return
+
+    event_names = dict(zip(my_events_df["Event ID"], my_events_df["Name"]))
+    selected_event_id = st.selectbox("Select Event", options=my_events_df["Event ID"].tolist(),
+                                      format_func=lambda x: event_names.get(x, x),
+                                      key="budget_tracking_event_select")
+
+    if selected_event_id:
+        event_info = my_events_df[my_events_df["Event ID"] == selected_event_id].iloc[0]
+        st.subheader(f"Budget for {event_info['Name']} ({selected_event_id})")
+        st.metric("Allocated Budget", f"₹{event_info['Budget']:,.2f}")
+
+        st.subheader("Conceptual Expenses 📉")
+        st.warning("This is conceptual expense data for demonstration. In a real system, you would integrate actual expense recording.")
+        
+        # Generate conceptual expenses for the selected event
+        event_conceptual_expenses = []
+        if event_info["Budget"] > 0:
+            conceptual_expense_amount = event_info["Budget"] * 0.3 # 30% of budget
+            event_conceptual_expenses.append({
+                "Expense ID": "EXP_C1",
+                "Category": "General Conceptual Expense",
+                "Amount": conceptual_expense_amount,
+                "Date": datetime.date.today(),
+                "Event ID": selected_event_id
+            })
+
+        event_expenses_for_display = pd.DataFrame(event_conceptual_expenses)
+
+        if event_expenses_for_display.empty:
+            st.info("No conceptual expenses recorded for this event yet.")
+        else:
+            st.dataframe(event_expenses_for_display[["Expense ID", "Category", "Amount", "Date"]], use_container_width=True)
+
+        total_conceptual_expenses = event_expenses_for_display["Amount"].sum() if not event_expenses_for_display.empty else 0
+        st.metric("Total Conceptual Expenses", f"₹{total_conceptual_expenses:,.2f}")
+        st.metric("Remaining Budget (Conceptual)", f"₹{event_info['Budget'] - total_conceptual_expenses:,.2f}")
+
+        st.subheader("Add New Expense (Conceptual Entry) ➕")
+        with st.expander("Add a new conceptual expense"):
+            with st.form(f"add_expense_form_{selected_event_id}"):
+                expense_category = st.text_input("Expense Category")
+                expense_amount = st.number_input("Amount", min_value=0.0, value=0.0, step=100.0)
+                expense_date = st.date_input("Date", datetime.date.today())
+                add_expense_button = st.form_submit_button("Add Expense (Conceptual)")
+                if add_expense_button:
+                    if validate_input(expense_category, "Expense Category") and expense_amount > 0:
+                        st.info(f"Conceptual Expense Added: Event '{event_info['Name']}' - {expense_category} - ₹{expense_amount} on {expense_date}. (This entry is not saved persistently.)")
+                    else:
+                        st.error("Please provide a category and a positive amount for the conceptual expense.")
+
+def show_communication_hub():
+    """Coordinator: View general announcements and potentially send event-specific communications."""
+    st.title("🗣️ Communication Hub")
+    st.markdown("---")
+    st.write(f"Manage communications for your events, {st.session_state.user_full_name}.")
+
+    st.subheader("Relevant Announcements")
+    # Display announcements relevant to coordinator or all
+    coordinator_relevant_announcements = show_paginated("hub_announcements_cursor", st.session_state.announcements_df, "Date Posted",
+                                                        show_announcement_rows, filters={"Target Role": ["All", "Coordinator"]})
+    if coordinator_relevant_announcements.empty:
+        st.info("No relevant announcements for you.")
+
+    st.subheader("Send Event-Specific Message ✉️")
+    st.write("Emails the participants registered for the event and the volunteers with a task on it.")
+    with st.expander("Send a Message"):
+        with st.form("send_message_form"):
+            my_events_df = db.rows(st.session_state.events_df, "Coordinator", st.session_state.user_full_name)
+            event_options = [""] + my_events_df["Event ID"].tolist()
+            event_names = dict(zip(my_events_df["Event ID"], my_events_df["Name"]))
+            target_event_id = st.selectbox("Select Event (leave empty to message all your events)", options=event_options,
+                                           format_func=lambda x: event_names.get(x, x) if x else "All My Events")
+            
+            message_subject = st.text_input("Subject")
+            message_content = st.text_area("Message Content")
+            
+            send_button = st.form_submit_button("Send Message")
+
+            if send_button:
+                if validate_input(message_subject, "Subject") and message_content:
+                    event_ids = [target_event_id] if target_event_id else my_events_df["Event ID"].tolist()
+                    recipients = event_recipients(event_ids)
+                    target_display = f"Event '{event_names[target_event_id]}'" if target_event_id else "all your events"
+                    dispatcher = email_dispatcher()
+                    if recipients.empty:
+                        st.warning(f"No participants or volunteers with an email address found for {target_display}.")
+                    elif dispatcher is None:
+                        st.warning(f"SMTP configuration incomplete. Message to {len(recipients)} recipient(s) not sent.")
+                        print(f"--- MOCK BULK EMAIL TO: {', '.join(recipients['Email'])} ---\nSubject: {message_subject}\n\n{message_content}\n--- END MOCK EMAIL ---")
+                    else:
+                        messages = [
+                            (email, message_subject, f"Hello {name},\n\n{message_content}\n\nRegards,\n{st.session_state.user_full_name} (Coordinator)")
+                            for email, name in zip(recipients["Email"], recipients["Name"])
+                        ]
+                        st.session_state.message_job_id = dispatcher.submit_bulk(messages)
+                        st.success(f"Message '{message_subject}' queued for {len(messages)} recipient(s) of {target_display}. 📧")
+                else:
+                    st.error("Please provide a subject and content for the message.")
+
+        # Delivery progress of the last message sent from this session
+        dispatcher = email_dispatcher()
+        job = dispatcher.job_status(st.session_state.message_job_id) if dispatcher is not None and "message_job_id" in st.session_state else None
+        if job is not None:
+            delivered = job["sent"] + job["failed"]
+            st.progress(delivered / job["total"] if job["total"] else 1.0,
+                        text=f"Delivered {job['sent']} of {job['total']} email(s)" + (f", {job['failed']} failed" if job["failed"] else "") + (" ✅" if job["done"] else " ⏳"))
+            if not job["done"]:
+                st.button("Refresh Progress 🔄", key="refresh_message_progress")
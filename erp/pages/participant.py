@@ -0,0 +1,121 @@
+"""Participant pages: event registration and their registrations."""
+import streamlit as st
+import pandas as pd
+import datetime
+
+from erp.search import get_event_search_index
+from erp.runtime import db, refresh_tables
+from erp.notifications import notify
+from erp.pages.common import show_paginated
+
+def show_register_for_events():
+    """Participant: View available events and register."""
+    st.title("📝 Register for Events")
+    st.markdown("---")
+    st.write(f"Welcome, {st.session_state.user_full_name}! Register for exciting upcoming events.")
+
+    st.subheader("Available Upcoming Events")
+    search_query = st.text_input("Search events by name, location, coordinator or description", key="register_event_search")
+    
+    if search_query:
+        upcoming_events = get_event_search_index().search(st.session_state.events_df, search_query)
+        upcoming_events = upcoming_events[upcoming_events["Status"] == "Upcoming"] if not upcoming_events.empty else upcoming_events
+    else:
+        upcoming_events = db.rows(st.session_state.events_df, "Status", "Upcoming")
+
+    if upcoming_events.empty:
+        st.info("No upcoming events available for registration at the moment, or no events match your search.")
+        return
+
+    events_for_display = upcoming_events[["Event ID", "Name", "Date", "Time", "Location", "Coordinator"]]
+    st.dataframe(events_for_display, use_container_width=True)
+
+    st.subheader("Register for an Event ✨")
+    show_registration_form(upcoming_events)
+
+@st.fragment
+def show_registration_form(upcoming_events):
+    """The registration form for `upcoming_events`, as a fragment: registering reruns only the form."""
+    refresh_tables("registrations") # Registrations made since the page was drawn count as already registered
+    with st.expander("Register for Selected Event"):
+        with st.form("event_registration_form"):
+            event_names = dict(zip(upcoming_events["Event ID"], upcoming_events["Name"]))
+            event_to_register_id = st.selectbox("Select Event to Register For", 
+                                                options=upcoming_events["Event ID"].tolist(), 
+                                                format_func=lambda x: event_names.get(x, x),
+                                                key="register_event_select")
+            
+            register_button = st.form_submit_button("Register Now")
+
+            if register_button:
+                if event_to_register_id:
+                    if not db.rows(db.rows(st.session_state.registrations_df, "Participant Username", st.session_state.username), "Event ID", event_to_register_id).empty:
+                        st.warning("You are already registered for this event. No need to register again! 🔔")
+                    else:
+                        new_reg_id = db.new_id("registrations")
+                        new_registration = {
+                            "Reg ID": new_reg_id,
+                            "Participant Username": st.session_state.username,
+                            "Event ID": event_to_register_id,
+                            "Registration Date": datetime.date.today()
+                        }
+                        db.append_rows("registrations", pd.DataFrame([new_registration])) # Save to storage
+                        event_name = event_names[event_to_register_id]
+                        st.success(f"Successfully registered for event '{event_name}'! 🎉")
+
+                        # Notify the participant
+                        event_row = upcoming_events[upcoming_events['Event ID'] == event_to_register_id]
+                        notify(st.session_state.username, "registration_confirmed", event_name=event_name,
+                               event_date=event_row['Date'].iloc[0], event_location=event_row['Location'].iloc[0])
+                else:
+                    st.error("Please select an event to register.")
+
+def show_my_registrations():
+    """Participant: View events they have registered for and allow cancellation."""
+    st.title("My Registrations 📋")
+    st.markdown("---")
+    st.write(f"Events you have registered for, {st.session_state.user_full_name}.")
+
+    my_regs = db.rows(st.session_state.registrations_df, "Participant Username", st.session_state.username)
+    
+    if my_regs.empty:
+        st.info("You haven't registered for any events yet.")
+        return
+
+    # Merge with event details for better display
+    def with_event_details(regs):
+        return pd.merge(regs, st.session_state.events_df[["Event ID", "Name", "Date", "Location", "Status"]], on="Event ID", how="left") if not st.session_state.events_df.empty else regs
+    display_regs = with_event_details(my_regs)
+    st.subheader("Your Registered Events")
+    show_paginated("my_registrations_cursor", st.session_state.registrations_df, "Registration Date",
+                   lambda regs: st.dataframe(with_event_details(regs)[["Name", "Date", "Location", "Status", "Registration Date"]], use_container_width=True),
+                   filters={"Participant Username": [st.session_state.username]})
+
+    st.subheader("Cancel Registration ❌")
+    with st.expander("Cancel an Event Registration"):
+        events_for_cancellation = display_regs[display_regs["Status"] == "Upcoming"] # Only allow cancelling upcoming events
+        if events_for_cancellation.empty:
+            st.info("No upcoming events to cancel registration for.")
+        else:
+            event_names = dict(zip(events_for_cancellation["Event ID"], events_for_cancellation["Name"]))
+            event_to_cancel_id = st.selectbox("Select Event to Cancel Registration For", 
+                                            options=events_for_cancellation["Event ID"].tolist(), 
+                                            format_func=lambda x: event_names.get(x, x),
+                                            key="cancel_registration_select")
+            
+            if event_to_cancel_id:
+                st.warning(f"Are you sure you want to cancel your registration for '{event_names[event_to_cancel_id]}'?")
+                col_y, col_n = st.columns(2)
+                with col_y:
+                    confirm_cancel = st.button("Yes, Cancel Registration", key="confirm_cancel_btn")
+                with col_n:
+                    st.button("No, Keep Registration", key="deny_cancel_btn")
+
+                if confirm_cancel:
+                    my_current_regs = db.rows(st.session_state.registrations_df, "Participant Username", st.session_state.username)
+                    cancelled_reg_ids = db.rows(my_current_regs, "Event ID", event_to_cancel_id)["Reg ID"].tolist()
+                    db.delete_rows("registrations", "Reg ID", cancelled_reg_ids, base_version=st.session_state.registrations_df.attrs.get("version")) # Save to storage
+                    st.success(f"Registration for '{event_names[event_to_cancel_id]}' cancelled successfully. 👋")
+                    st.rerun()
+            else:
+                st.info("Please select an event to cancel registration.")
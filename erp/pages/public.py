@@ -0,0 +1,128 @@
+"""Pages open to everyone: the home page, announcements and event details."""
+import streamlit as st
+import pandas as pd
+import datetime
+
+from erp.schema import TARGET_ROLES
+from erp.search import get_event_search_index
+from erp.runtime import db, load_tables, storage_available
+from erp.pages.common import show_announcement_rows, show_paginated, validate_input
+
+def home_page():
+    """Displays the general home page."""
+    st.title("🏛️ Inter-College Festive Event ERP")
+    st.markdown("---")
+    st.write("This system helps manage all aspects of our annual inter-college festive events, from planning and budgeting to registration and volunteer coordination.")
+    st.image("https://images.pexels.com/photos/357335/pexels-photo-357335.jpeg?auto=compress&cs=tinysrgb&w=1260&h=750&dpr=1", caption="Festive Event", use_column_width=True)
+    st.markdown("---")
+    if not st.session_state.logged_in:
+        st.info("Please log in using the sidebar to access specific functionalities based on your role.")
+        # Without a storage backend there are no users to log in as (checked without loading the users table)
+        if not storage_available:
+            st.warning("No user data loaded. Please ensure Google Sheets are correctly configured and accessible to enable login.")
+        else:
+            st.markdown("Try logging in with existing users from your Google Sheet.")
+    else:
+        st.info(f"You are logged in as **{st.session_state.user_full_name}** ({st.session_state.role}). Use the sidebar for navigation.")
+
+def show_announcements():
+    """Displays announcements visible to the current user's role."""
+    st.title("📢 Announcements")
+    st.markdown("---")
+    st.write("Stay updated with the latest news and important messages.")
+
+    current_role = st.session_state.role if st.session_state.logged_in else "Public"
+
+    # Newest first, filtered on target role, a page at a time
+    relevant_announcements = show_paginated(f"announcements_cursor_{current_role}", st.session_state.announcements_df, "Date Posted",
+                                            show_announcement_rows, filters={"Target Role": ["All", current_role]})
+    if relevant_announcements.empty:
+        st.info("No announcements available at the moment.")
+
+    if st.session_state.role in ["Admin", "Coordinator"]:
+        st.subheader("Create New Announcement 📝")
+        with st.expander("Expand to Create New Announcement"):
+            with st.form("new_announcement_form"):
+                announcement_title = st.text_input("Title")
+                announcement_content = st.text_area("Content")
+                target_role_options = TARGET_ROLES
+                if st.session_state.role == "Coordinator": # Coordinators can only target All or their own role and below (simplified)
+                    target_role_options = ["All", "Coordinator", "Participant", "Volunteer"]
+                announcement_target = st.selectbox("Target Audience", options=target_role_options)
+                
+                submit_announcement = st.form_submit_button("Publish Announcement")
+
+                if submit_announcement:
+                    if validate_input(announcement_title, "Title") and announcement_content:
+                        new_announcement_id = db.new_id("announcements")
+                        new_entry = {
+                            "Announcement ID": new_announcement_id,
+                            "Title": announcement_title,
+                            "Content": announcement_content,
+                            "Author Username": st.session_state.username,
+                            "Date Posted": datetime.date.today(),
+                            "Target Role": announcement_target
+                        }
+                        db.append_rows("announcements", pd.DataFrame([new_entry]))
+                        st.rerun()
+                    else:
+                        st.error("Please fill in both title and content for the announcement.")
+
+def show_view_event_details():
+    """Participant: View detailed information about events."""
+    st.title("ℹ️ View Event Details")
+    st.markdown("---")
+    st.write(f"{'Welcome, ' + st.session_state.user_full_name + '!' if st.session_state.logged_in else 'Welcome!'} Browse details of our upcoming events.")
+
+    st.subheader("All Events")
+    
+    search_query = st.text_input("Search events by name, location, coordinator or description", key="event_details_search")
+    
+    filtered_events = st.session_state.events_df
+    if search_query:
+        filtered_events = get_event_search_index().search(filtered_events, search_query)
+
+    if filtered_events.empty:
+        st.info("No events found matching your search criteria.")
+    else:
+        event_names = dict(zip(filtered_events["Event ID"], filtered_events["Name"]))
+        selected_event_id = st.selectbox("Select an Event to view details", 
+                                        options=filtered_events["Event ID"].tolist(),
+                                        format_func=lambda x: event_names.get(x, x),
+                                        key="view_event_details_select")
+        
+        if selected_event_id:
+            event_details = filtered_events[filtered_events["Event ID"] == selected_event_id].iloc[0]
+            st.markdown("---")
+            st.subheader(f"{event_details['Name']} Details")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write(f"**Event ID:** `{event_details['Event ID']}`")
+                st.write(f"**Date:** `{event_details['Date']}`")
+                st.write(f"**Time:** `{event_details['Time']}`")
+                st.write(f"**Location:** `{event_details['Location']}`")
+            with col2:
+                st.write(f"**Coordinator:** `{event_details['Coordinator']}`")
+                st.write(f"**Status:** `{event_details['Status']}`")
+                if 'Budget' in event_details and event_details['Budget'] > 0:
+                    st.write(f"**Budget:** `₹{event_details['Budget']:,.2f}` (Internal)")
+                
+            st.markdown("---")
+            st.write("**Description:**")
+            st.markdown(event_details['Description'])
+            
+            if st.session_state.logged_in and st.session_state.role == "Participant":
+                # Check registration status
+                load_tables("registrations")
+                is_registered = not db.rows(db.rows(st.session_state.registrations_df, "Participant Username", st.session_state.username), "Event ID", selected_event_id).empty
+                
+                if is_registered:
+                    st.success("You are already registered for this event! 🎉")
+                else:
+                    if event_details["Status"] == "Upcoming":
+                        st.info(f"You can register for '{event_details['Name']}' on the 'Register for Events' page.")
+                    else:
+                        st.warning(f"Registration for '{event_details['Name']}' is not currently open (Status: {event_details['Status']}).")
+            elif not st.session_state.logged_in:
+                st.info("Log in as a Participant to register for events.")
@@ -0,0 +1,109 @@
+"""Volunteer pages: their tasks and availability."""
+import streamlit as st
+import pandas as pd
+
+from erp.runtime import db, refresh_tables, rerun_fragment, user_directory
+from erp.pages.common import show_paginated
+
+def show_my_tasks():
+    """Volunteer: View assigned tasks and update their status."""
+    st.title("My Tasks ✅")
+    st.markdown("---")
+    st.write(f"Tasks assigned to you as a volunteer, {st.session_state.user_full_name}.")
+
+    show_my_task_list()
+
+@st.fragment
+def show_my_task_list():
+    """The volunteer's tasks and the status updater, as a fragment: a status update reruns only this list."""
+    refresh_tables("tasks")
+    my_tasks = db.rows(st.session_state.tasks_df, "Assigned To Volunteer Username", st.session_state.username)
+
+    if my_tasks.empty:
+        st.info("You currently have no tasks assigned.")
+        return
+
+    # Merge with event details for better display
+    def with_event_details(tasks):
+        return pd.merge(tasks, st.session_state.events_df[["Event ID", "Name", "Date", "Location"]], on="Event ID", how="left") if not st.session_state.events_df.empty else tasks
+    display_tasks = with_event_details(my_tasks)
+    st.subheader("Your Assigned Tasks")
+    show_paginated("my_tasks_cursor", st.session_state.tasks_df, "Due Date",
+                   lambda tasks: st.dataframe(with_event_details(tasks)[["Name", "Date", "Location", "Description", "Due Date", "Status"]], use_container_width=True),
+                   filters={"Assigned To Volunteer Username": [st.session_state.username]}, descending=False)
+
+    st.subheader("Update Task Status 🔄")
+    with st.expander("Update a Task's Status"):
+        if not display_tasks.empty:
+            task_labels = {row["Task ID"]: f"{row['Name']} - {row['Description']} (Due: {row['Due Date']})" for _, row in display_tasks.iterrows()}
+            selected_task_id = st.selectbox("Select Task to Update", options=list(task_labels), format_func=task_labels.get, key="select_task_to_update_volunteer")
+            
+            if selected_task_id:
+                selected_task_row = display_tasks[display_tasks["Task ID"] == selected_task_id].iloc[0]
+
+                current_status = selected_task_row["Status"]
+                new_status = st.selectbox(
+                    "New Status", 
+                    options=["Assigned", "In Progress", "Completed", "Pending"], 
+                    index=["Assigned", "In Progress", "Completed", "Pending"].index(current_status),
+                    key=f"task_status_update_{selected_task_id}"
+                )
+                
+                if st.button(f"Update Status for '{selected_task_row['Description']}' in '{selected_task_row['Name']}'", 
+                             key=f"update_task_btn_{selected_task_id}"):
+                    idx_in_main_df = db.rows(st.session_state.tasks_df, "Task ID", selected_task_id).index
+                    
+                    if not idx_in_main_df.empty:
+                        updated_task = st.session_state.tasks_df.loc[idx_in_main_df].copy()
+                        updated_task["Status"] = new_status
+                        if not db.update_rows("tasks", "Task ID", updated_task): # Save to storage
+                            st.success(f"Status for '{selected_task_row['Description']}' updated to '{new_status}'. ✅")
+                        rerun_fragment()
+                    else:
+                        st.error("Could not find the task to update.")
+
+def show_update_availability():
+    """Volunteer: Manage their availability status."""
+    st.title("📅 Update Availability")
+    st.markdown("---")
+    st.write(f"Manage your availability for volunteer assignments, {st.session_state.user_full_name}.")
+    show_availability_selector()
+
+@st.fragment
+def show_availability_selector():
+    """The volunteer's availability status and selector, as a fragment: saving reruns only the selector."""
+    refresh_tables("users", "volunteers")
+    users_df = st.session_state.users_df
+    current_user = user_directory().get(st.session_state.username)
+    current_availability = current_user.availability if current_user is not None and current_user.availability else "Available"
+    
+    st.subheader("Current Availability Status")
+    st.info(f"Your current availability is: **{current_availability}**")
+
+    new_availability = st.selectbox("Update your Availability", options=["Available", "Busy", "On Leave"], key="volunteer_availability_select")
+    
+    if st.button("Save Availability", key="save_availability_btn"):
+        # Update in the users_df
+        user_idx = db.rows(users_df, "Username", st.session_state.username).index
+        if not user_idx.empty:
+            updated_user = st.session_state.users_df.loc[user_idx].copy()
+            updated_user["Availability"] = new_availability
+            db.update_rows("users", "Username", updated_user) # Save to storage
+
+        # Update in `volunteers_df` (which is used for coordinator assignment)
+        volunteer_idx = st.session_state.volunteers_df[st.session_state.volunteers_df["Volunteer Username"] == st.session_state.username].index if not st.session_state.volunteers_df.empty else pd.Index([])
+        if not volunteer_idx.empty:
+            updated_volunteer = st.session_state.volunteers_df.loc[volunteer_idx].copy()
+            updated_volunteer["Availability"] = new_availability
+            db.update_rows("volunteers", "Volunteer Username", updated_volunteer) # Save to storage
+        else:
+            # If for some reason the volunteer isn't in volunteers_df, add them (edge case)
+            new_volunteer_entry = {
+                "Volunteer Username": st.session_state.username,
+                "Full Name": st.session_state.user_full_name,
+                "Availability": new_availability
+            }
+            db.append_rows("volunteers", pd.DataFrame([new_volunteer_entry])) # Save to storage
+
+        st.success(f"Your availability has been updated to: **{new_availability}** ✅")
+        rerun_fragment()
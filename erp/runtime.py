@@ -0,0 +1,75 @@
+"""The storage backend and data store of this process, and the helpers putting tables in the session state."""
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+from erp.schema import SHEET_PRIMARY_KEYS
+from erp.storage import DataStore, SQLiteDB
+from erp.directory import get_user_directory
+
+storage_config = st.secrets.storage if "storage" in st.secrets else {}
+
+def open_storage_backend():
+    """
+    Returns the storage backend selected in the [storage] secrets section, the GoogleSheetDB among its layers
+    (None if Google Sheets is not used) and why Google Sheets is unavailable (None if it is connected or not used).
+    Google Sheets is the default; with `backend = "sqlite"` the app runs on a local SQLite file, optionally
+    mirroring every write to Google Sheets. The Google Sheets stack is only imported when Sheets are used.
+    """
+    use_sqlite = storage_config.get("backend", "sheets") == "sqlite"
+    sqlite_path = storage_config.get("sqlite_path", "festive_event_erp.db")
+    if use_sqlite and not (storage_config.get("mirror_to_sheets", True) and "google_sheets" in st.secrets):
+        return SQLiteDB(sqlite_path), None, None
+
+    from erp.sheets import open_google_db
+    google_db, unavailable_reason = open_google_db(storage_config)
+    if not use_sqlite:
+        return google_db, google_db, unavailable_reason
+    sheets_mirror = google_db if unavailable_reason is None else None
+    storage_backend = SQLiteDB(sqlite_path, mirror=sheets_mirror)
+    if sheets_mirror is not None:
+        storage_backend.seed_from(sheets_mirror, SHEET_PRIMARY_KEYS.keys())
+    return storage_backend, google_db, unavailable_reason
+
+# The backend is opened once per process, on the first run
+storage_backend, google_db, storage_warning = open_storage_backend()
+
+# All sessions read and write through the shared in-memory copy of each table
+db = DataStore(storage_backend)
+storage_available = storage_warning is None or storage_backend is not google_db
+
+# Query parameter holding the session token of a logged-in browser tab (see erp.auth)
+SESSION_TOKEN_PARAM = "session"
+
+# Data from the shared store (or empty DataFrames if Sheets are disabled) is loaded into the session state as
+# `<table>_df` on first use in each run, so a run only loads the tables on screen. These DataFrames are
+# references to the shared, read-only snapshot of each table; pages must write through `db` rather than
+# modifying them in place. `st.session_state.loaded_tables` lists the tables loaded during the current run,
+# and is reset by the app at the start of each run.
+
+def load_tables(*sheet_names):
+    """Puts the current snapshots of the given tables in the session state, loading those not loaded yet in this run in one batch."""
+    loaded_tables = st.session_state.setdefault("loaded_tables", set())
+    missing = [sheet_name for sheet_name in sheet_names if sheet_name not in loaded_tables]
+    if missing:
+        for sheet_name, df in db.read_sheets(missing).items():
+            st.session_state[f"{sheet_name}_df"] = df
+        loaded_tables.update(missing)
+
+def refresh_tables(*sheet_names):
+    """Re-reads tables into the session state. Fragments call it, as their reruns skip the page code that loaded the tables."""
+    for sheet_name, df in db.read_sheets(sheet_names).items():
+        st.session_state[f"{sheet_name}_df"] = df
+
+def rerun_fragment():
+    """Reruns only the calling fragment, or the whole app if the fragment is being drawn by a full run."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException: # scope="fragment" is only allowed during a fragment rerun
+        st.rerun()
+
+def user_directory():
+    """Returns the shared user directory, rebuilt first if the users table changed since it was last built."""
+    load_tables("users")
+    directory = get_user_directory()
+    directory.refresh(st.session_state.users_df)
+    return directory
@@ -0,0 +1,141 @@
+"""
+Allowed values, table schemas and primary keys of the ERP tables, and the conversions between
+DataFrames and their stored form.
+"""
+import pandas as pd
+
+# Allowed values of the categorical columns, shared by the table schemas and the pages' selectboxes
+ROLES = ["Admin", "Coordinator", "Participant", "Volunteer"]
+TARGET_ROLES = ["All"] + ROLES
+AVAILABILITY_OPTIONS = ["Available", "Busy", "On Leave", "N/A"]
+EVENT_STATUSES = ["Upcoming", "Ongoing", "Completed", "Cancelled"]
+TASK_STATUSES = ["Assigned", "Pending", "In Progress", "Completed"]
+SPONSOR_TIERS = ["Bronze", "Silver", "Gold", "Platinum"]
+NOTIFICATION_MODES = ["Immediate", "Digest"]
+
+# Declared schema of each worksheet: column -> "text", "number", "date" or the list of allowed values of a
+# categorical column. Tables are cast to these dtypes when loaded and serialized back from them when saved.
+SHEET_SCHEMAS = {
+    "users": {"Username": "text", "Password": "text", "Role": ROLES, "Name": "text", "Email": "text",
+              "Availability": AVAILABILITY_OPTIONS, "Notification Mode": NOTIFICATION_MODES},
+    "events": {"Event ID": "text", "Name": "text", "Date": "date", "Time": "text", "Location": "text",
+               "Coordinator": "text", "Budget": "number", "Status": EVENT_STATUSES, "Description": "text"},
+    "registrations": {"Reg ID": "text", "Participant Username": "text", "Event ID": "text", "Registration Date": "date"},
+    "volunteers": {"Volunteer Username": "text", "Full Name": "text", "Availability": AVAILABILITY_OPTIONS},
+    "tasks": {"Task ID": "text", "Event ID": "text", "Description": "text", "Assigned To Volunteer Username": "text",
+              "Due Date": "date", "Status": TASK_STATUSES, "Created By": "text"},
+    "announcements": {"Announcement ID": "text", "Title": "text", "Content": "text", "Author Username": "text",
+                      "Date Posted": "date", "Target Role": TARGET_ROLES},
+    "sponsors": {"Sponsor ID": "text", "Name": "text", "Contact Person": "text", "Contact Email": "text",
+                 "Contribution Amount": "number", "Tier": SPONSOR_TIERS, "Date Added": "date"},
+}
+
+# Column types regardless of the sheet, for serializing (a column name has the same type in every sheet)
+COLUMN_TYPES = {col: col_type for schema in SHEET_SCHEMAS.values() for col, col_type in schema.items()}
+
+DATE_FORMAT = "%Y-%m-%d" # Format dates are written in; cells entered by hand in another format are still parsed
+
+def _to_timestamps(values):
+    """Parses a column of dates with DATE_FORMAT, retrying only the cells in another format. Unparseable cells become NaT."""
+    parsed = pd.to_datetime(values, format=DATE_FORMAT, errors="coerce")
+    retry = parsed.isna() & values.notna() & (values.astype("str") != "")
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry].astype("str"), format="mixed", errors="coerce")
+    return parsed
+
+def apply_schema(sheet_name, df):
+    """
+    Returns `df` cast to the declared schema of `sheet_name`: text columns as strings, numbers as floats,
+    dates as datetime.date objects and categorical columns as categoricals. Blank cells become missing values
+    (except in text columns); values outside a column's allowed list are kept as extra categories.
+    Columns not in the schema are left as they are.
+    """
+    schema = SHEET_SCHEMAS.get(sheet_name)
+    if not schema or df.columns.empty:
+        return df
+    df = df.copy()
+    for col in df.columns.intersection(list(schema)):
+        col_type = schema[col]
+        if col_type == "text":
+            df[col] = df[col].astype("str")
+        elif col_type == "number":
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        elif col_type == "date":
+            df[col] = _to_timestamps(df[col]).dt.date
+        else:
+            labels = df[col].astype("str")
+            labels = labels.where(labels != "")
+            extra_values = sorted(set(labels.dropna()) - set(col_type))
+            df[col] = pd.Categorical(labels, categories=list(col_type) + extra_values)
+    return df
+
+def _has_schema_dtype(values, col_type):
+    if col_type == "text":
+        return values.dtype == "str"
+    if col_type == "number":
+        return pd.api.types.is_numeric_dtype(values)
+    if col_type == "date":
+        return values.dtype == object
+    return isinstance(values.dtype, pd.CategoricalDtype)
+
+def conform_schema(sheet_name, df):
+    """
+    Returns `df` with only the columns whose dtype no longer matches the schema of `sheet_name` recast (e.g. a
+    categorical column that became object when rows with other categories were merged in). Much cheaper than
+    apply_schema() for a table assembled from frames that were cast already.
+    """
+    schema = SHEET_SCHEMAS.get(sheet_name)
+    if not schema:
+        return df
+    stale_columns = [col for col in df.columns.intersection(list(schema)) if not _has_schema_dtype(df[col], schema[col])]
+    if not stale_columns:
+        return df
+    return df.assign(**apply_schema(sheet_name, df[stale_columns]))
+
+def serialize_frame(df):
+    """
+    Converts a typed table back into plain cell values, the inverse of apply_schema(): dates are formatted
+    with DATE_FORMAT and categoricals written as their labels. Missing values become None.
+    """
+    serialized = df.astype(object)
+    for col in df.columns:
+        if COLUMN_TYPES.get(col) == "date":
+            serialized[col] = _to_timestamps(df[col]).dt.strftime(DATE_FORMAT).astype(object)
+    return serialized.where(serialized.notna(), None)
+
+# Primary key column of each worksheet, used to match rows when syncing partial changes
+SHEET_PRIMARY_KEYS = {
+    "users": "Username",
+    "events": "Event ID",
+    "registrations": "Reg ID",
+    "volunteers": "Volunteer Username",
+    "tasks": "Task ID",
+    "announcements": "Announcement ID",
+    "sponsors": "Sponsor ID",
+}
+
+def diff_dataframes(snapshot_df, edited_df, key_col):
+    """
+    Compares an edited DataFrame against the snapshot it was derived from, matching rows on `key_col`.
+    Returns a dict with the changed cells as (key, column) pairs, the added rows and the deleted keys,
+    or None if the two frames cannot be diffed cell by cell (different columns, missing or duplicate keys).
+    """
+    if list(snapshot_df.columns) != list(edited_df.columns) or key_col not in edited_df.columns:
+        return None
+    if snapshot_df[key_col].duplicated().any() or edited_df[key_col].isna().any() or edited_df[key_col].duplicated().any():
+        return None
+
+    before = snapshot_df.set_index(snapshot_df[key_col].astype(str))
+    after = edited_df.set_index(edited_df[key_col].astype(str))
+    common_keys = after.index.intersection(before.index, sort=False)
+    old_values = before.loc[common_keys].astype(object)
+    new_values = after.loc[common_keys].astype(object)
+    # Two missing values count as equal; NaN != NaN would otherwise flag every blank cell
+    changed = (old_values != new_values) & ~(old_values.isna() & new_values.isna())
+    changed_cells = changed.stack()
+
+    return {
+        "changed_cells": changed_cells[changed_cells].index.tolist(),
+        "added": edited_df[~after.index.isin(before.index)],
+        "deleted": before.index[~before.index.isin(after.index)].tolist(),
+    }
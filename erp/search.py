@@ -0,0 +1,83 @@
+"""Shared inverted index of the events table for the event search boxes."""
+import streamlit as st
+import pandas as pd
+import numpy as np
+import re
+import threading
+import bisect
+
+from erp.schema import SHEET_PRIMARY_KEYS
+
+class EventSearchIndex:
+    """
+    Inverted index of the events table for the event search boxes, shared by all sessions: the words of the
+    searchable columns, kept sorted for prefix lookups, each with the row positions it appears in. It is
+    built once per version of the events table, so a search costs a few dictionary hits instead of a
+    substring scan of every event. Filtered frames keep the table's version in their attrs, so the index
+    also records the keys of the rows it was built from, and is only reused for a frame with the same rows.
+    """
+    FIELD_WEIGHTS = {"Name": 4, "Location": 2, "Coordinator": 2, "Description": 1} # Matches in heavier fields rank higher
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = (None, None, [], {}) # Version of the events table, keys of its rows, sorted words, word -> {row position: weight}
+
+    @staticmethod
+    def _row_keys(events_df):
+        key_col = SHEET_PRIMARY_KEYS["events"]
+        return events_df[key_col].to_numpy() if key_col in events_df.columns else np.arange(len(events_df))
+
+    def _built_from(self, index, events_df):
+        """Returns True if `index` was built from the rows of `events_df`: same table version, same rows in the same order."""
+        version, keys = index[0], index[1]
+        return version is not None and version == events_df.attrs.get("version") and np.array_equal(keys, self._row_keys(events_df))
+
+    @staticmethod
+    def _words(text):
+        return re.findall(r"\w+", str(text).lower())
+
+    def _build(self, events_df):
+        postings = {}
+        for col, weight in self.FIELD_WEIGHTS.items():
+            if col not in events_df.columns:
+                continue
+            for position, text in enumerate(events_df[col]):
+                if pd.isna(text):
+                    continue
+                for word in self._words(text):
+                    word_postings = postings.setdefault(word, {})
+                    word_postings[position] = max(word_postings.get(position, 0), weight)
+        return (events_df.attrs.get("version"), self._row_keys(events_df), sorted(postings), postings)
+
+    def search(self, events_df, query):
+        """
+        Returns the rows of `events_df` that match every word of `query` as a word or word prefix, best match
+        first: heavier fields and whole-word matches score higher.
+        """
+        index = self._index
+        if not self._built_from(index, events_df):
+            index = self._build(events_df)
+            if index[0] is not None:
+                with self._lock:
+                    self._index = index
+        _, _, words, postings = index
+        scores = None
+        for term in dict.fromkeys(self._words(query)):
+            term_scores = {}
+            for i in range(bisect.bisect_left(words, term), len(words)):
+                if not words[i].startswith(term):
+                    break
+                bonus = 2 if words[i] == term else 1
+                for position, weight in postings[words[i]].items():
+                    term_scores[position] = max(term_scores.get(position, 0), weight * bonus)
+            scores = term_scores if scores is None else {position: score + term_scores[position] for position, score in scores.items() if position in term_scores}
+            if not scores:
+                break
+        if scores is None: # No words in the query
+            return events_df
+        return events_df.iloc[sorted(scores, key=lambda position: (-scores[position], position))]
+
+@st.cache_resource
+def get_event_search_index():
+    """Returns the EventSearchIndex shared by the whole process."""
+    return EventSearchIndex()
@@ -0,0 +1,741 @@
+"""
+Google Sheets storage backend and its write-behind queue. Only imported when Google Sheets is used,
+as gspread and oauth2client are slow to import.
+"""
+import streamlit as st
+import pandas as pd
+import json
+import gspread
+from gspread.utils import a1_to_rowcol
+from oauth2client.service_account import ServiceAccountCredentials
+import threading
+import time
+import atexit
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+from erp.schema import apply_schema, serialize_frame
+from erp.storage import StorageBackend, StorageReadError
+
+# --- Google Sheets Database Configuration ---
+spreadsheet_name = "FestiveEventERP_DB"
+
+@st.cache_resource
+def initialize_gspread_client():
+    """Initialize and cache Google Sheets client. Returns the client, the spreadsheet and why Sheets are unavailable (None if connected)."""
+    try:
+        if "google_sheets" in st.secrets and "service_account_key" in st.secrets.google_sheets:
+            creds_json = json.loads(st.secrets.google_sheets.service_account_key)
+            scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+            creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_json, scope)
+            client = gspread.authorize(creds)
+            spreadsheet = client.open(spreadsheet_name)
+            return client, spreadsheet, None
+        else:
+            return None, None, "Google Sheets secrets not found. Running with no persistent data."
+    except gspread.exceptions.GSpreadException as e:
+        return None, None, f"Error initializing Google Sheets: {e}. Running with no persistent data."
+
+class SheetGenerations:
+    """
+    Process-wide write counter per worksheet. The counter is part of the read cache key,
+    so bumping it after a write invalidates the cached copy of that sheet only.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generations = {}
+
+    def get(self, sheet_name):
+        with self._lock:
+            return self._generations.get(sheet_name, 0)
+
+    def bump(self, *sheet_names):
+        with self._lock:
+            for sheet_name in sheet_names:
+                self._generations[sheet_name] = self._generations.get(sheet_name, 0) + 1
+
+@st.cache_resource
+def get_sheet_generations():
+    """Returns the SheetGenerations shared by all sessions."""
+    return SheetGenerations()
+
+class RevisionTracker:
+    """
+    Turns the spreadsheet's Drive modifiedTime into a revision number that only changes on outside edits.
+    The modifiedTime is polled at most once per check interval. After our own writes it is fetched once and
+    recorded as the new baseline, so the change they made is absorbed: the shared tables already hold it.
+    An outside edit made between the last poll and our write is absorbed with it; as the pages and the
+    write-behind queue check the revision right before they write, that window is short.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._modified_time = None
+        self._revision = 0
+        self._checked_at = None
+
+    def record_own_write(self, modified_time):
+        """Takes `modified_time`, fetched right after our writes, as the new baseline."""
+        with self._lock:
+            self._modified_time = modified_time
+            self._checked_at = time.monotonic()
+
+    def force_change(self):
+        """Counts a change as if someone had edited the spreadsheet, so every table loaded before it is reloaded."""
+        with self._lock:
+            self._revision += 1
+
+    def current(self, fetch_modified_time, check_interval):
+        """Returns the revision number, calling `fetch_modified_time` if the last check is older than `check_interval` seconds."""
+        with self._lock:
+            now = time.monotonic()
+            if self._checked_at is not None and now - self._checked_at < check_interval:
+                return self._revision
+            self._checked_at = now # Claim this check so concurrent sessions don't all poll Drive at once
+        modified_time = fetch_modified_time()
+        with self._lock:
+            if self._modified_time is not None and modified_time != self._modified_time:
+                self._revision += 1
+            self._modified_time = modified_time
+            return self._revision
+
+@st.cache_resource
+def get_revision_tracker(spreadsheet_name):
+    """Returns the RevisionTracker of a spreadsheet, shared by all sessions and the write-behind worker."""
+    return RevisionTracker()
+
+class WorksheetRegistry:
+    """
+    Worksheet handles of a spreadsheet keyed by title, loaded with a single metadata call.
+    Spreadsheet.worksheet() fetches the whole spreadsheet's metadata on every call; the registry only
+    refetches it when a title is unknown (WorksheetNotFound) or on an explicit reload().
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_title = None
+
+    def reload(self, spreadsheet):
+        worksheets = spreadsheet.worksheets()
+        with self._lock:
+            self._by_title = {worksheet.title: worksheet for worksheet in worksheets}
+
+    def get(self, spreadsheet, title):
+        """Returns the worksheet titled `title`, raising WorksheetNotFound if it does not exist."""
+        if self._by_title is None:
+            self.reload(spreadsheet)
+        worksheet = self._by_title.get(title)
+        if worksheet is None:
+            self.reload(spreadsheet) # The worksheet may have been added or renamed since the last load
+            worksheet = self._by_title.get(title)
+        if worksheet is None:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return worksheet
+
+@st.cache_resource
+def get_worksheet_registry(spreadsheet_name):
+    """Returns the WorksheetRegistry of a spreadsheet, shared by all sessions and the write-behind worker."""
+    return WorksheetRegistry()
+
+class GoogleSheetDB(StorageBackend):
+    """
+    A class to manage interactions with Google Sheets as a database.
+    If gspread is not enabled, it returns empty DataFrames and does not save data. Failed reads raise
+    StorageReadError and are not retried for a backoff delay that grows with each consecutive failure.
+    With a `write_queue`, writes are handed to the write-behind queue instead of being sent inline.
+    With `notify=False` (used by the queue's worker thread), no Streamlit messages are shown and write errors are raised.
+    """
+    MAX_READ_BACKOFF = 60 # Seconds
+    ID_RESERVATIONS_SHEET = "id_reservations" # Log of the ID blocks reserved by every process, see reserve_ids
+
+    def __init__(self, spreadsheet_name, gspread_enabled=False, spreadsheet=None, write_queue=None, notify=True, freshness_interval=10):
+        self._spreadsheet_name = spreadsheet_name
+        self._gspread_enabled = gspread_enabled
+        self._spreadsheet = spreadsheet
+        self._generations = get_sheet_generations()
+        self._revisions = get_revision_tracker(spreadsheet_name)
+        self._worksheets = get_worksheet_registry(spreadsheet_name)
+        self._freshness_interval = freshness_interval
+        self._write_queue = write_queue
+        self._notify = notify
+        self._backoff_lock = threading.Lock()
+        self._read_failures = 0
+        self._retry_reads_at = 0.0
+
+    def __hash__(self):
+        return hash((self._spreadsheet_name, self._gspread_enabled))
+
+    def __eq__(self, other):
+        if not isinstance(other, GoogleSheetDB):
+            return NotImplemented
+        return self._spreadsheet_name == other._spreadsheet_name and \
+               self._gspread_enabled == other._gspread_enabled
+
+    # Cached reads are keyed on the sheets' generations and the spreadsheet's revision, which change exactly
+    # when a cached copy goes stale, so entries don't expire on a timer; old ones are evicted by count
+    @st.cache_data(max_entries=64)
+    def _read_sheet_cached(_self, sheet_name, generation, revision): # Using _self to tell Streamlit not to hash this param
+        """
+        Helper to read a sheet with caching. `generation` and `revision` key the cache entry to the sheet's
+        last write and the spreadsheet's last outside edit.
+        """
+        return _self._load_sheet(sheet_name)
+
+    def _load_sheet(self, sheet_name):
+        """Reads a sheet from the API (no caching)."""
+        if self._gspread_enabled:
+            self._check_read_backoff()
+            st.info(f"Attempting to load data for '{sheet_name}' from Google Sheets...")
+            try:
+                if self._spreadsheet is None: # Defensive check
+                    raise ValueError("Google Sheets spreadsheet object not initialized.")
+                worksheet = self._worksheet(sheet_name)
+                data = worksheet.get_all_records()
+            except gspread.exceptions.WorksheetNotFound as e:
+                st.error(f"Worksheet '{sheet_name}' not found: {e}")
+                return pd.DataFrame()
+            except Exception as e:
+                self._read_failed(f"Failed to read sheet '{sheet_name}' from Google Sheets: {e}")
+            self._read_succeeded()
+            return apply_schema(sheet_name, pd.DataFrame(data))
+        else:
+            st.info(f"Google Sheets is disabled. Returning empty DataFrame for '{sheet_name}'.")
+            return pd.DataFrame() # Always return empty if disabled
+
+    def read_sheet(self, sheet_name):
+        """
+        Reads data from a specified worksheet, using cache. If Sheets are disabled, returns empty DataFrame.
+        Raises StorageReadError if the sheet cannot be read.
+        """
+        revision = self.revision()
+        if revision is None: # Without a revision nothing tells when a cached copy is stale; DataStore's max_age paces these reads
+            return self._load_sheet(sheet_name)
+        return self._read_sheet_cached(sheet_name, self._generations.get(sheet_name), revision) # 'self' is implicitly passed as '_self'
+
+    def _invalidate(self, *sheet_names):
+        """Drops the cached copies of the given sheets; other sheets stay cached."""
+        self._generations.bump(*sheet_names)
+
+    def _check_read_backoff(self):
+        """Raises StorageReadError while reads are backing off after a failure, without calling the API."""
+        with self._backoff_lock:
+            wait = self._retry_reads_at - time.monotonic()
+        if wait > 0:
+            message = f"Google Sheets could not be reached. Showing the data loaded so far; retrying in {wait:.0f} s."
+            st.warning(message)
+            raise StorageReadError(message)
+
+    def _read_failed(self, message):
+        """Shows and raises a read error, and backs off further reads (2, 4, 8, ... seconds, up to MAX_READ_BACKOFF)."""
+        with self._backoff_lock:
+            self._read_failures += 1
+            self._retry_reads_at = time.monotonic() + min(2 ** self._read_failures, self.MAX_READ_BACKOFF)
+        st.error(f"{message}. Showing the data loaded so far.")
+        raise StorageReadError(message)
+
+    def _read_succeeded(self):
+        with self._backoff_lock:
+            self._read_failures = 0
+            self._retry_reads_at = 0.0
+
+    def _worksheet(self, sheet_name):
+        """Returns the cached handle of a worksheet, without a metadata round trip once the registry is loaded."""
+        return self._worksheets.get(self._spreadsheet, sheet_name)
+
+    def reload_worksheets(self):
+        """Refetches the worksheet handles, e.g. after worksheets were added, renamed or deleted by hand."""
+        if self._gspread_enabled and self._spreadsheet is not None:
+            self._worksheets.reload(self._spreadsheet)
+
+    def revision(self):
+        """
+        Returns the spreadsheet's revision number, based on the Drive modifiedTime (one small metadata call,
+        made at most once per freshness interval). Returns None if Sheets are disabled or the check fails.
+        """
+        if not self._gspread_enabled or self._spreadsheet is None:
+            return None
+        try:
+            return self._revisions.current(self._spreadsheet.get_lastUpdateTime, self._freshness_interval)
+        except Exception as e:
+            print(f"--- FRESHNESS CHECK FAILED FOR '{self._spreadsheet_name}' ---\n{e}")
+            return None
+
+    @staticmethod
+    def _frame_from_values(sheet_name, values):
+        """Builds a typed DataFrame from raw sheet values (header row first), numericised like get_all_records()."""
+        if not values:
+            return pd.DataFrame()
+        header, rows = values[0], values[1:]
+        records = [
+            gspread.utils.numericise_all((row + [""] * len(header))[:len(header)])
+            for row in rows
+        ]
+        return apply_schema(sheet_name, pd.DataFrame(records, columns=header))
+
+    def _fetch_all_values(self, sheet_names):
+        """
+        Fetches the raw values of several worksheets. Uses a single values_batch_get call, and falls back
+        to one parallel get_all_values() per sheet if the batch request is rejected (e.g. a worksheet is missing).
+        Returns a dict of sheet name to values; sheets that do not exist map to None.
+        """
+        try:
+            response = self._spreadsheet.values_batch_get([gspread.utils.absolute_range_name(name) for name in sheet_names])
+            return {name: value_range.get("values", []) for name, value_range in zip(sheet_names, response["valueRanges"])}
+        except gspread.exceptions.APIError as e:
+            print(f"--- BATCH READ FAILED, FALLING BACK TO PARALLEL READS ---\n{e}")
+
+        def fetch(sheet_name):
+            try:
+                return self._worksheet(sheet_name).get_all_values()
+            except gspread.exceptions.WorksheetNotFound:
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(8, len(sheet_names))) as executor:
+            return dict(zip(sheet_names, executor.map(fetch, sheet_names)))
+
+    @st.cache_data(max_entries=64)
+    def _read_sheets_cached(_self, sheet_names, generations, revision): # Using _self to tell Streamlit not to hash this param
+        """
+        Helper to read several sheets in one round trip with caching. `generations` and `revision` key the
+        entry to the sheets' last writes and the spreadsheet's last outside edit.
+        """
+        return _self._load_sheets(sheet_names)
+
+    def _load_sheets(self, sheet_names):
+        """Reads several sheets from the API in one round trip where possible (no caching)."""
+        if not self._gspread_enabled:
+            st.info(f"Google Sheets is disabled. Returning empty DataFrames for {', '.join(sheet_names)}.")
+            return {sheet_name: pd.DataFrame() for sheet_name in sheet_names}
+
+        self._check_read_backoff()
+        st.info(f"Attempting to load data for {', '.join(sheet_names)} from Google Sheets...")
+        try:
+            if self._spreadsheet is None: # Defensive check
+                raise ValueError("Google Sheets spreadsheet object not initialized.")
+            all_values = self._fetch_all_values(list(sheet_names))
+        except Exception as e:
+            self._read_failed(f"Failed to read sheets {', '.join(sheet_names)} from Google Sheets: {e}")
+        self._read_succeeded()
+
+        dataframes = {}
+        for sheet_name, values in all_values.items():
+            if values is None:
+                st.error(f"Worksheet '{sheet_name}' not found.")
+                dataframes[sheet_name] = pd.DataFrame()
+            else:
+                dataframes[sheet_name] = self._frame_from_values(sheet_name, values)
+        return dataframes
+
+    def read_sheets(self, sheet_names):
+        """
+        Reads several worksheets at once, in a single API round trip where possible. Returns a dict of sheet name
+        to DataFrame. Raises StorageReadError if the sheets cannot be read.
+        """
+        sheet_names = tuple(sheet_names)
+        if not sheet_names:
+            return {}
+        revision = self.revision()
+        if revision is None:
+            return self._load_sheets(sheet_names)
+        generations = tuple(self._generations.get(sheet_name) for sheet_name in sheet_names)
+        return self._read_sheets_cached(sheet_names, generations, revision)
+
+    @staticmethod
+    def _to_sheet_values(df, columns=None):
+        """Converts a DataFrame into a list of rows that gspread can serialize, ordered by `columns`."""
+        df_to_write = serialize_frame(df.reindex(columns=columns) if columns is not None else df)
+        # Missing values (unassigned volunteers, columns absent from `df`) are written as blank cells
+        return df_to_write.where(df_to_write.notna(), "").values.tolist()
+
+    def _tracked_write(self, sheet_name, write_fn):
+        """
+        Runs `write_fn` on the worksheet and returns what it returns. An inline write checks the revision first
+        (throttled like any read) and records the modifiedTime it produced after (one Drive call), so it does not
+        count as an outside edit. The write-behind worker (`notify=False`) leaves both to the queue, once per flush.
+        """
+        if self._notify:
+            self.revision() # Usually answered from the last check, made by this run's reads
+        result = write_fn(self._worksheet(sheet_name))
+        if self._notify:
+            self.record_own_writes()
+        return result
+
+    def record_own_writes(self):
+        """Records the spreadsheet's modifiedTime after our writes as the revision baseline, with one Drive call."""
+        try:
+            self._revisions.record_own_write(self._spreadsheet.get_lastUpdateTime())
+        except Exception as e: # The writes went through; at worst the next poll reloads the tables once
+            print(f"--- FRESHNESS CHECK FAILED FOR '{self._spreadsheet_name}' ---\n{e}")
+
+    def _run_write(self, sheet_name, action, write_fn):
+        """
+        Runs a write operation against `sheet_name` with the shared status messages and failure handling.
+        `write_fn` receives the worksheet and returns the success message to show.
+        """
+        if not self._notify:
+            self._tracked_write(sheet_name, write_fn) # Errors propagate to the write-behind worker
+            self._invalidate(sheet_name)
+            return
+
+        if self._gspread_enabled:
+            st.info(f"Attempting to {action} for '{sheet_name}' in Google Sheets...")
+            try:
+                if self._spreadsheet is None: # Defensive check
+                    raise ValueError("Google Sheets spreadsheet object not initialized.")
+                st.success(self._tracked_write(sheet_name, write_fn))
+            except Exception as e:
+                st.error(f"Failed to {action} for '{sheet_name}' in Google Sheets: {e}")
+                st.warning("This change is shown in the app but was not saved to Google Sheets, and is lost when the sheet is next reloaded.")
+        else:
+            st.warning(f"Google Sheets is disabled. Changes for '{sheet_name}' are not saved persistently.")
+        
+        self._invalidate(sheet_name) # Invalidate only the written sheet's cache (even if not saved)
+
+    def _write_sheet(self, sheet_name, df):
+        """Helper to write data to a sheet (no caching)."""
+        def write(worksheet):
+            worksheet.clear() # Clear existing content
+            worksheet.update([df.columns.values.tolist()] + self._to_sheet_values(df))
+            return f"Data for '{sheet_name}' written to Google Sheets. 💾"
+
+        self._run_write(sheet_name, "write data", write)
+
+    def _queue_write(self, method, sheet_name, *args):
+        """Hands a write to the write-behind queue, if there is one. Returns True if the write was queued."""
+        if self._write_queue is None or not self._gspread_enabled:
+            return False
+        self._write_queue.submit(method, sheet_name, *args)
+        st.info(f"Changes for '{sheet_name}' queued for saving to Google Sheets. ⏳")
+        return True
+
+    def has_pending_writes(self, sheet_name):
+        """Returns True if writes to the sheet are waiting in the write-behind queue or being flushed."""
+        return self._write_queue is not None and self._write_queue.has_pending(sheet_name)
+
+    def write_lost(self, sheet_name):
+        """
+        Called by the write-behind queue when it gave up on a write to `sheet_name`. The shared tables hold a change
+        that never reached the spreadsheet: its cache is dropped and the revision moved on, so they are reloaded.
+        """
+        self._invalidate(sheet_name)
+        self._revisions.force_change()
+
+    def write_queue_stats(self):
+        """Returns the write-behind queue's depth and flush latency figures, or None if writes are not queued."""
+        return self._write_queue.stats() if self._write_queue is not None else None
+
+    def save_dataframe(self, sheet_name, df):
+        """Saves a DataFrame to a worksheet. If Sheets are disabled, warns that data is not saved."""
+        if self._queue_write("save_dataframe", sheet_name, df):
+            return
+        self._write_sheet(sheet_name, df)
+
+    @staticmethod
+    def _ensure_header(worksheet, header, columns):
+        """Extends the sheet's header row with any of `columns` it does not have yet. Returns the new header."""
+        missing_columns = [col for col in columns if col not in header]
+        if not missing_columns:
+            return header
+        new_header = header + missing_columns
+        if len(new_header) > worksheet.col_count:
+            worksheet.add_cols(len(new_header) - worksheet.col_count)
+        worksheet.update([new_header], "A1")
+        return new_header
+
+    @staticmethod
+    def _locate_rows(worksheet, header, key_col):
+        """Maps each key in `key_col` to its 1-based sheet row number, reading only that column."""
+        if key_col not in header:
+            raise KeyError(f"Key column '{key_col}' not found in worksheet '{worksheet.title}'.")
+        key_values = worksheet.col_values(header.index(key_col) + 1)
+        return {str(key): row_number for row_number, key in enumerate(key_values[1:], start=2) if key != ""}
+
+    def _append_to_worksheet(self, worksheet, header, df):
+        """Appends `df` below the last row of `worksheet`, writing the header first if the sheet is blank."""
+        if not header:
+            worksheet.update([df.columns.values.tolist()] + self._to_sheet_values(df))
+            return
+        header = self._ensure_header(worksheet, header, df.columns)
+        worksheet.append_rows(self._to_sheet_values(df, header), table_range="A1")
+
+    def append_rows(self, sheet_name, df):
+        """Appends the rows of `df` to a worksheet without rewriting the rows already there."""
+        if df.empty or self._queue_write("append_rows", sheet_name, df):
+            return
+
+        def write(worksheet):
+            self._append_to_worksheet(worksheet, worksheet.row_values(1), df)
+            return f"{len(df)} row(s) added to '{sheet_name}' in Google Sheets. 💾"
+
+        self._run_write(sheet_name, "append rows", write)
+
+    def update_rows(self, sheet_name, key_col, df):
+        """
+        Upserts the rows of `df` into a worksheet, matching existing rows on `key_col`.
+        Matching rows are overwritten in place with a single batch update; unmatched rows are appended.
+        """
+        if df.empty or self._queue_write("update_rows", sheet_name, key_col, df):
+            return
+
+        def write(worksheet):
+            header = worksheet.row_values(1)
+            header = self._ensure_header(worksheet, header, df.columns)
+            row_numbers = self._locate_rows(worksheet, header, key_col)
+            keys = df[key_col].astype(str)
+            in_sheet = keys.map(lambda key: key in row_numbers).astype(bool) # Per row of `df`, not of the sheet
+            existing = df[in_sheet]
+            new = df[~in_sheet]
+
+            if not existing.empty:
+                existing_values = self._to_sheet_values(existing, header)
+                existing_keys = existing[key_col].astype(str)
+                if set(header) <= set(df.columns):
+                    updates = [
+                        {"range": f"A{row_numbers[key]}:{gspread.utils.rowcol_to_a1(row_numbers[key], len(header))}", "values": [values]}
+                        for key, values in zip(existing_keys, existing_values)
+                    ]
+                else:
+                    # Partial rows: write only the given columns so the other cells keep their values
+                    updates = [
+                        {"range": gspread.utils.rowcol_to_a1(row_numbers[key], header.index(col) + 1), "values": [[values[header.index(col)]]]}
+                        for key, values in zip(existing_keys, existing_values)
+                        for col in df.columns
+                    ]
+                worksheet.batch_update(updates)
+            if not new.empty:
+                self._append_to_worksheet(worksheet, header, new)
+            return f"{len(existing)} row(s) updated and {len(new)} row(s) added in '{sheet_name}'. 💾"
+
+        self._run_write(sheet_name, "update rows", write)
+
+    def delete_rows(self, sheet_name, key_col, keys):
+        """Deletes the rows whose `key_col` value is in `keys`, in a single batch request."""
+        keys = {str(key) for key in keys}
+        if not keys or self._queue_write("delete_rows", sheet_name, key_col, keys):
+            return
+
+        def write(worksheet):
+            row_numbers = self._locate_rows(worksheet, worksheet.row_values(1), key_col)
+            deleted_count = self._delete_sheet_rows(worksheet, [row_numbers[key] for key in keys if key in row_numbers])
+            if not deleted_count:
+                return f"No matching rows to delete in '{sheet_name}'."
+            return f"{deleted_count} row(s) deleted from '{sheet_name}' in Google Sheets. 💾"
+
+        self._run_write(sheet_name, "delete rows", write)
+
+    def _delete_sheet_rows(self, worksheet, row_numbers):
+        """Deletes the given 1-based sheet rows in a single batch request. Returns the number of rows deleted."""
+        rows_to_delete = sorted(set(row_numbers), reverse=True)
+        if not rows_to_delete:
+            return 0
+
+        # Collapse adjacent rows into ranges; deleting bottom-up keeps earlier row numbers valid
+        ranges = []
+        for row_number in rows_to_delete:
+            if ranges and ranges[-1][0] == row_number + 1:
+                ranges[-1][0] = row_number
+            else:
+                ranges.append([row_number, row_number])
+        self._spreadsheet.batch_update({"requests": [
+            {"deleteDimension": {"range": {
+                "sheetId": worksheet.id,
+                "dimension": "ROWS",
+                "startIndex": start - 1,
+                "endIndex": end,
+            }}}
+            for start, end in ranges
+        ]})
+        return len(rows_to_delete)
+
+    def _ensure_id_reservations_worksheet(self):
+        """Creates the worksheet logging ID reservations (with its header) if it does not exist yet."""
+        try:
+            self._worksheet(self.ID_RESERVATIONS_SHEET)
+        except gspread.exceptions.WorksheetNotFound:
+            worksheet = self._spreadsheet.add_worksheet(self.ID_RESERVATIONS_SHEET, rows=1, cols=3)
+            worksheet.update([["Sheet Name", "Count", "Floor"]], "A1")
+            self.reload_worksheets()
+
+    def reserve_ids(self, sheet_name, count, floor):
+        """
+        Reserves a block of ID numbers through the id_reservations worksheet, a log with one row per reservation.
+        Appends are serialized by Sheets, so every process numbering from the log sees the same row order: each
+        reservation's block starts after the previous block of its table (and above its own floor). Our block is
+        found from the row our append landed on, so the counter needs no lock and is shared by every process.
+        Returns None if Sheets are disabled or the reservation fails.
+        """
+        if not self._gspread_enabled or self._spreadsheet is None:
+            return None
+
+        def reserve(worksheet):
+            response = worksheet.append_rows([[sheet_name, count, floor]], table_range="A1", insert_data_option="INSERT_ROWS")
+            row_number = a1_to_rowcol(response["updates"]["updatedRange"].split("!")[-1].split(":")[0])[0]
+            reservations = worksheet.get(f"A2:C{row_number}")
+            if len(reservations) != row_number - 1 or reservations[-1][0] != sheet_name:
+                raise ValueError(f"Reservation not found in row {row_number} of '{self.ID_RESERVATIONS_SHEET}'.")
+            block_end = 0
+            for reserved_sheet, reserved_count, reserved_floor in reservations:
+                if reserved_sheet == sheet_name:
+                    first = max(block_end, int(reserved_floor) + 1)
+                    block_end = first + int(reserved_count)
+            return first # The last reservation of the table is ours
+
+        try:
+            self._ensure_id_reservations_worksheet()
+            return self._tracked_write(self.ID_RESERVATIONS_SHEET, reserve)
+        except Exception as e:
+            print(f"--- ID RESERVATION FAILED FOR '{sheet_name}' ---\n{e}")
+            return None
+
+class WriteBehindQueue:
+    """
+    Background writer for GoogleSheetDB. Writes are queued and acknowledged immediately (the pages have
+    already applied them to their in-memory DataFrames); a worker thread waits `window` seconds after the
+    first pending write, coalesces everything queued per worksheet and flushes it in as few calls as possible.
+    A write that still fails after MAX_ATTEMPTS is dropped and reported to the writer (see GoogleSheetDB.write_lost),
+    and listed in the stats for the admin dashboard.
+    """
+    MAX_ATTEMPTS = 3
+    LOST_WRITES_KEPT = 20 # Most recent dropped writes listed in the stats
+
+    def __init__(self, writer, window=0.5):
+        self._writer = writer # A GoogleSheetDB without a queue, used to apply the coalesced writes
+        self._window = window
+        self._pending = []
+        self._flushing = set() # Sheets whose writes the current flush is applying
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stats = {"flushes": 0, "writes_flushed": 0, "writes_failed": 0, "last_flush_ms": 0.0, "avg_flush_ms": 0.0, "oldest_wait_ms": 0.0}
+        self._lost_writes = collections.deque(maxlen=self.LOST_WRITES_KEPT)
+        threading.Thread(target=self._run, name="sheets-write-behind", daemon=True).start()
+        atexit.register(self.flush) # Don't lose queued writes on a clean shutdown
+
+    def submit(self, method, sheet_name, *args):
+        """Queues a call to `writer.<method>(sheet_name, *args)`. DataFrames are copied so later in-place edits don't leak in."""
+        args = tuple(arg.copy() if isinstance(arg, pd.DataFrame) else arg for arg in args)
+        with self._condition:
+            self._pending.append({"method": method, "sheet_name": sheet_name, "args": args, "attempts": 0, "queued_at": time.monotonic()})
+            self._condition.notify()
+
+    def has_pending(self, sheet_name):
+        """Returns True if writes to `sheet_name` are queued or being flushed."""
+        with self._condition:
+            return sheet_name in self._flushing or any(write["sheet_name"] == sheet_name for write in self._pending)
+
+    def stats(self):
+        """Returns queue depth and flush latency figures for monitoring."""
+        with self._condition:
+            stats = dict(self._stats, queue_depth=len(self._pending), lost_writes=list(self._lost_writes))
+            stats["pending_age_ms"] = (time.monotonic() - self._pending[0]["queued_at"]) * 1000 if self._pending else 0.0
+        return stats
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+            time.sleep(self._window) # Let a burst of edits accumulate before flushing
+            self.flush()
+
+    @staticmethod
+    def _coalesce(writes):
+        """
+        Merges the queued writes of one worksheet, keeping their order: a full rewrite supersedes everything
+        queued before it, and consecutive appends, updates (same key and columns) and deletes are combined.
+        """
+        merged = []
+        for write in writes:
+            if write["method"] == "save_dataframe":
+                merged = [write]
+                continue
+            previous = merged[-1] if merged else None
+            if previous is None or previous["method"] != write["method"]:
+                merged.append(write)
+            elif write["method"] == "append_rows":
+                previous["args"] = (pd.concat([previous["args"][0], write["args"][0]], ignore_index=True),)
+            elif write["method"] == "update_rows" and previous["args"][0] == write["args"][0] and \
+                    list(previous["args"][1].columns) == list(write["args"][1].columns):
+                key_col = write["args"][0]
+                combined = pd.concat([previous["args"][1], write["args"][1]], ignore_index=True)
+                previous["args"] = (key_col, combined.drop_duplicates(subset=key_col, keep="last"))
+            elif write["method"] == "delete_rows" and previous["args"][0] == write["args"][0]:
+                previous["args"] = (write["args"][0], list(previous["args"][1]) + list(write["args"][1]))
+            else:
+                merged.append(write)
+        return merged
+
+    def _write_lost(self, write, error):
+        with self._condition:
+            self._stats["writes_failed"] += 1
+            self._lost_writes.append({"sheet_name": write["sheet_name"], "method": write["method"], "attempts": write["attempts"], "error": str(error), "at": time.time()})
+        try:
+            self._writer.write_lost(write["sheet_name"])
+        except Exception as e:
+            print(f"--- WRITE-BEHIND: COULD NOT REPORT THE LOST WRITE ON '{write['sheet_name']}' ---\n{e}")
+
+    def flush(self):
+        """
+        Applies every queued write now. A failed write is re-queued up to MAX_ATTEMPTS times, and the writes
+        queued after it for the same worksheet are held back and re-queued behind it, so they still apply in order.
+        """
+        with self._flush_lock:
+            with self._condition:
+                batch, self._pending = self._pending, []
+                self._flushing = {write["sheet_name"] for write in batch}
+            if not batch:
+                return
+
+            started = time.monotonic()
+            self._writer.revision() # Count outside edits made since the last check before our writes are absorbed
+            writes_by_sheet = {}
+            for write in batch:
+                writes_by_sheet.setdefault(write["sheet_name"], []).append(write)
+
+            failed, written = [], False
+            for sheet_name, writes in writes_by_sheet.items():
+                coalesced = self._coalesce(writes)
+                for position, write in enumerate(coalesced):
+                    try:
+                        getattr(self._writer, write["method"])(sheet_name, *write["args"])
+                        written = True
+                    except Exception as e:
+                        write["attempts"] += 1
+                        print(f"--- WRITE-BEHIND FAILED: {write['method']} on '{sheet_name}' (attempt {write['attempts']}) ---\n{e}")
+                        if write["attempts"] < self.MAX_ATTEMPTS:
+                            # Later writes may depend on this one (e.g. an update of appended rows): retry them all in order
+                            failed.extend(coalesced[position:])
+                            break
+                        self._write_lost(write, e)
+            if written:
+                self._writer.record_own_writes() # Once for the whole flush
+
+            elapsed_ms = (time.monotonic() - started) * 1000
+            with self._condition:
+                self._pending[:0] = failed # Retry failed writes ahead of newer ones
+                self._flushing = set()
+                self._stats["flushes"] += 1
+                self._stats["writes_flushed"] += len(batch)
+                self._stats["last_flush_ms"] = elapsed_ms
+                self._stats["avg_flush_ms"] += (elapsed_ms - self._stats["avg_flush_ms"]) / self._stats["flushes"]
+                self._stats["oldest_wait_ms"] = (started - min(write["queued_at"] for write in batch)) * 1000
+
+@st.cache_resource
+def get_write_behind_queue(spreadsheet_name, _spreadsheet):
+    """Creates the write-behind queue (and its worker thread) shared by all sessions writing to `spreadsheet_name`."""
+    writer = GoogleSheetDB(spreadsheet_name, gspread_enabled=True, spreadsheet=_spreadsheet, notify=False)
+    return WriteBehindQueue(writer)
+
+def open_google_db(storage_config):
+    """
+    Returns the GoogleSheetDB of the app's spreadsheet, configured by the [storage] secrets section, and why
+    Google Sheets is unavailable (None if connected; the GoogleSheetDB then holds no data). Writes go through
+    the write-behind queue unless `write_behind = false` in [storage].
+    """
+    gspread_client, spreadsheet, unavailable_reason = initialize_gspread_client()
+    gspread_enabled = unavailable_reason is None
+    google_db = GoogleSheetDB(
+        spreadsheet_name=spreadsheet_name if gspread_enabled else "N/A",
+        gspread_enabled=gspread_enabled,
+        spreadsheet=spreadsheet,
+        write_queue=get_write_behind_queue(spreadsheet_name, spreadsheet) if gspread_enabled and storage_config.get("write_behind", True) else None,
+        freshness_interval=storage_config.get("freshness_interval", 10) # Seconds between checks for edits made directly in the spreadsheet
+    )
+    return google_db, unavailable_reason
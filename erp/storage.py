@@ -0,0 +1,847 @@
+"""
+Storage backends of the ERP tables (the StorageBackend interface and the SQLite backend) and the
+DataStore facade the pages use: shared in-memory copies of the tables with their indexes and aggregates.
+"""
+import streamlit as st
+import pandas as pd
+import re
+import sqlite3
+import threading
+import time
+import bisect
+
+from erp.schema import SHEET_PRIMARY_KEYS, apply_schema, conform_schema, diff_dataframes, serialize_frame
+
+class StorageReadError(Exception):
+    """Raised by a storage backend when tables cannot be read right now (e.g. a network error); the read may be retried later."""
+
+class StorageBackend:
+    """
+    Interface shared by the storage backends. Tables are addressed by worksheet name
+    (users, events, registrations, ...) and exchanged as DataFrames.
+    """
+    def read_sheet(self, sheet_name):
+        """Returns the table as a DataFrame (empty if it does not exist)."""
+        raise NotImplementedError
+
+    def read_sheets(self, sheet_names):
+        """Returns a dict of sheet name to DataFrame. Raises StorageReadError if the tables cannot be read."""
+        return {sheet_name: self.read_sheet(sheet_name) for sheet_name in sheet_names}
+
+    def save_dataframe(self, sheet_name, df):
+        """Replaces the whole table with `df`."""
+        raise NotImplementedError
+
+    def append_rows(self, sheet_name, df):
+        """Adds the rows of `df` to the table."""
+        raise NotImplementedError
+
+    def update_rows(self, sheet_name, key_col, df):
+        """Upserts the rows of `df`, matching existing rows on `key_col`."""
+        raise NotImplementedError
+
+    def delete_rows(self, sheet_name, key_col, keys):
+        """Deletes the rows whose `key_col` value is in `keys`."""
+        raise NotImplementedError
+
+    def has_pending_writes(self, sheet_name):
+        """Returns True if writes to the table were accepted but are not readable from the backend yet."""
+        return False
+
+    def reserve_ids(self, sheet_name, count, floor):
+        """
+        Reserves `count` consecutive ID numbers for new rows of `sheet_name`, all greater than `floor`, and returns
+        the first one. Returns None if the backend keeps no shared ID counter or the reservation failed.
+        """
+        return None
+
+    def revision(self):
+        """
+        Returns a cheap revision number that changes when the stored data was modified by someone else,
+        or None if the backend has no such signal (callers then fall back to time-based refreshes).
+        """
+        return None
+
+# Columns indexed in the shared in-memory tables and the SQLite backend, matching the filters the pages run most often
+SECONDARY_INDEXES = {
+    "events": ["Coordinator", "Status"],
+    "registrations": ["Participant Username", "Event ID", "Registration Date"],
+    "tasks": ["Event ID", "Assigned To Volunteer Username"],
+    "announcements": ["Target Role"],
+    "users": ["Role"],
+}
+
+# Columns the shared tables keep a sorted index on, for the paginated feeds and tables
+SORTED_INDEXES = {
+    "announcements": ["Date Posted"],
+    "registrations": ["Registration Date"],
+    "tasks": ["Due Date"],
+}
+
+# Aggregates kept up to date on the shared tables for the dashboard and reports:
+# name -> (column to group by, or None for the whole table; column to sum, or None to only count rows)
+TABLE_AGGREGATES = {
+    "registrations": {
+        "per_event": ("Event ID", None),
+        "per_participant": ("Participant Username", None),
+        "per_day": ("Registration Date", None),
+    },
+    "tasks": {"per_volunteer": ("Assigned To Volunteer Username", None)},
+    "events": {"budget": (None, "Budget")},
+    "sponsors": {"contributions": (None, "Contribution Amount"), "per_tier": ("Tier", "Contribution Amount")},
+}
+
+@st.cache_resource
+def get_sqlite_connection(db_path):
+    """Opens and caches the SQLite connection shared by all sessions, with the lock that serializes access to it."""
+    connection = sqlite3.connect(db_path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    return connection, threading.Lock()
+
+class SQLiteDB(StorageBackend):
+    """
+    Local storage backend keeping each worksheet in a SQLite table keyed on its primary key column.
+    Writes can optionally be mirrored to another backend (Google Sheets), which then only serves as a copy.
+    """
+    def __init__(self, db_path, mirror=None):
+        self._db_path = db_path
+        self._connection, self._lock = get_sqlite_connection(db_path)
+        self._mirror = mirror
+
+    @staticmethod
+    def _quote(name):
+        return '"' + name.replace('"', '""') + '"'
+
+    def _table_columns(self, sheet_name):
+        rows = self._connection.execute(f"PRAGMA table_info({self._quote(sheet_name)})").fetchall()
+        return [row[1] for row in rows]
+
+    def _ensure_table(self, sheet_name, columns):
+        """Creates the table and its indexes if needed, and adds any of `columns` it does not have yet."""
+        existing_columns = self._table_columns(sheet_name)
+        if not existing_columns:
+            key_col = SHEET_PRIMARY_KEYS.get(sheet_name)
+            column_defs = [self._quote(col) + (" PRIMARY KEY" if col == key_col else "") for col in columns]
+            self._connection.execute(f"CREATE TABLE {self._quote(sheet_name)} ({', '.join(column_defs)})")
+            existing_columns = list(columns)
+        for col in columns:
+            if col not in existing_columns:
+                self._connection.execute(f"ALTER TABLE {self._quote(sheet_name)} ADD COLUMN {self._quote(col)}")
+                existing_columns.append(col)
+        for col in SECONDARY_INDEXES.get(sheet_name, []):
+            if col in existing_columns:
+                index_name = self._quote(f"idx_{sheet_name}_{col}".replace(" ", "_").lower())
+                self._connection.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {self._quote(sheet_name)} ({self._quote(col)})")
+
+    @staticmethod
+    def _to_sql_rows(df):
+        """Converts a DataFrame into rows of plain Python values; missing values become NULL and dates ISO strings."""
+        return serialize_frame(df).values.tolist()
+
+    def _insert(self, sheet_name, df, conflict_clause=""):
+        columns = ", ".join(self._quote(col) for col in df.columns)
+        placeholders = ", ".join("?" for _ in df.columns)
+        self._connection.executemany(
+            f"INSERT INTO {self._quote(sheet_name)} ({columns}) VALUES ({placeholders}) {conflict_clause}",
+            self._to_sql_rows(df)
+        )
+
+    def _run_write(self, sheet_name, action, write_fn):
+        """Runs `write_fn` in a transaction under the connection lock. Returns True if it committed."""
+        try:
+            with self._lock, self._connection:
+                write_fn()
+            return True
+        except sqlite3.Error as e:
+            st.error(f"Failed to {action} for '{sheet_name}' in the local database: {e}")
+            return False
+
+    def reserve_ids(self, sheet_name, count, floor):
+        """Reserves a block of ID numbers from the id_counters table; the transaction makes it safe across processes."""
+        try:
+            with self._lock, self._connection:
+                self._connection.execute("CREATE TABLE IF NOT EXISTS id_counters (sheet_name TEXT PRIMARY KEY, next_value INTEGER NOT NULL)")
+                self._connection.execute("INSERT INTO id_counters VALUES (?, ?) ON CONFLICT(sheet_name) DO NOTHING", (sheet_name, floor + 1))
+                next_value = self._connection.execute("SELECT next_value FROM id_counters WHERE sheet_name = ?", (sheet_name,)).fetchone()[0]
+                first = max(next_value, floor + 1)
+                self._connection.execute("UPDATE id_counters SET next_value = ? WHERE sheet_name = ?", (first + count, sheet_name))
+            return first
+        except sqlite3.Error as e:
+            print(f"--- ID RESERVATION FAILED FOR '{sheet_name}' ---\n{e}")
+            return None
+
+    def revision(self):
+        """Returns SQLite's data_version, which changes only when another connection (e.g. a script editing the file) commits."""
+        with self._lock:
+            return self._connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def read_sheet(self, sheet_name):
+        """Reads a table into a DataFrame. Returns an empty DataFrame if the table does not exist yet."""
+        with self._lock:
+            if not self._table_columns(sheet_name):
+                return pd.DataFrame()
+            df = pd.read_sql_query(f"SELECT * FROM {self._quote(sheet_name)} ORDER BY rowid", self._connection)
+        return apply_schema(sheet_name, df)
+
+    def save_dataframe(self, sheet_name, df):
+        """Replaces the table with `df`, keeping the DataFrame's column order."""
+        def write():
+            self._connection.execute(f"DROP TABLE IF EXISTS {self._quote(sheet_name)}")
+            self._ensure_table(sheet_name, df.columns)
+            self._insert(sheet_name, df)
+
+        if self._run_write(sheet_name, "write data", write) and self._mirror is not None:
+            self._mirror.save_dataframe(sheet_name, df)
+
+    def append_rows(self, sheet_name, df):
+        """Inserts the rows of `df`. Fails without writing anything if a primary key already exists."""
+        if df.empty:
+            return
+
+        def write():
+            self._ensure_table(sheet_name, df.columns)
+            self._insert(sheet_name, df)
+
+        if self._run_write(sheet_name, "append rows", write) and self._mirror is not None:
+            self._mirror.append_rows(sheet_name, df)
+
+    def update_rows(self, sheet_name, key_col, df):
+        """Upserts the rows of `df` on `key_col`; only the columns present in `df` are overwritten."""
+        if df.empty:
+            return
+
+        def write():
+            self._ensure_table(sheet_name, df.columns)
+            if key_col == SHEET_PRIMARY_KEYS.get(sheet_name):
+                assignments = ", ".join(f"{self._quote(col)} = excluded.{self._quote(col)}" for col in df.columns if col != key_col)
+                self._insert(sheet_name, df, f"ON CONFLICT({self._quote(key_col)}) DO UPDATE SET {assignments}" if assignments else "ON CONFLICT DO NOTHING")
+                return
+            # Not the table's primary key: update matching rows, then insert the rest
+            for row in self._to_sql_rows(df):
+                values = dict(zip(df.columns, row))
+                assignments = ", ".join(f"{self._quote(col)} = ?" for col in df.columns)
+                cursor = self._connection.execute(
+                    f"UPDATE {self._quote(sheet_name)} SET {assignments} WHERE {self._quote(key_col)} = ?",
+                    row + [values[key_col]]
+                )
+                if cursor.rowcount == 0:
+                    self._insert(sheet_name, pd.DataFrame([values]))
+
+        if self._run_write(sheet_name, "update rows", write) and self._mirror is not None:
+            self._mirror.update_rows(sheet_name, key_col, df)
+
+    def delete_rows(self, sheet_name, key_col, keys):
+        """Deletes the rows whose `key_col` value is in `keys`."""
+        keys = [str(key) for key in keys]
+        if not keys:
+            return
+
+        def write():
+            if not self._table_columns(sheet_name):
+                return
+            placeholders = ", ".join("?" for _ in keys)
+            self._connection.execute(
+                f"DELETE FROM {self._quote(sheet_name)} WHERE CAST({self._quote(key_col)} AS TEXT) IN ({placeholders})", keys
+            )
+
+        if self._run_write(sheet_name, "delete rows", write) and self._mirror is not None:
+            self._mirror.delete_rows(sheet_name, key_col, keys)
+
+    def seed_from(self, source, sheet_names):
+        """Copies the given sheets from `source` into tables that do not exist locally yet (e.g. on first start)."""
+        with self._lock:
+            missing_sheets = [sheet_name for sheet_name in sheet_names if not self._table_columns(sheet_name)]
+        if not missing_sheets:
+            return
+        try:
+            source_dfs = source.read_sheets(missing_sheets)
+        except StorageReadError as e:
+            print(f"--- IMPORT FROM THE MIRROR FAILED, RETRIED ON NEXT START ---\n{e}")
+            return
+        for sheet_name, df in source_dfs.items():
+            if df.empty:
+                continue
+            key_col = SHEET_PRIMARY_KEYS.get(sheet_name)
+            if key_col in df.columns:
+                # Legacy sheets may hold duplicate keys; keep the last occurrence rather than failing the import
+                df = df.drop_duplicates(subset=key_col, keep="last")
+
+            def write(sheet_name=sheet_name, df=df):
+                self._ensure_table(sheet_name, df.columns)
+                self._insert(sheet_name, df)
+            self._run_write(sheet_name, "import data", write)
+
+def _page_entries(entries, limit=None, after=None, until=None, descending=True, accept=None):
+    """
+    Pages through `entries`, a sorted list of (sort value, key) cursors: returns the (at most `limit`) entries
+    after the cursor `after`, up to and including the cursor `until`, in ascending or descending order, that
+    `accept(key)` (if given) lets through; and whether more such entries follow.
+    """
+    if descending:
+        start = bisect.bisect_left(entries, after) if after is not None else len(entries)
+        ordered = (entries[i] for i in range(start - 1, -1, -1))
+    else:
+        start = bisect.bisect_right(entries, after) if after is not None else 0
+        ordered = (entries[i] for i in range(start, len(entries)))
+    page = []
+    for entry in ordered:
+        if accept is not None and not accept(entry[1]):
+            continue
+        if (limit is not None and len(page) == limit) or (until is not None and (entry < until if descending else entry > until)):
+            return page, True
+        page.append(entry)
+    return page, False
+
+def _cursor_values(values):
+    return values.astype("str").fillna("") # Missing values sort first
+
+class TableIndexes:
+    """
+    Indexes of one shared table: primary key -> row position, for each of `columns` value -> primary keys,
+    and for each of `sort_columns` the (value, primary key) pairs in sorted order. They are built once when
+    the table is loaded and then updated in place from the rows each write changed, so a lookup costs
+    O(matching rows) instead of a scan. Tables without unique primary keys are not indexed.
+    """
+    def __init__(self, df, key_col, columns, sort_columns=()):
+        self._key_col = key_col
+        self._columns = list(columns)
+        self._sort_columns = list(sort_columns)
+        self.rebuild(df)
+
+    def rebuild(self, df):
+        self._positions, self._buckets, self._sorted, self._sort_values = {}, {}, {}, {}
+        self._valid = self._key_col in df.columns and all(col in df.columns for col in self._columns + self._sort_columns)
+        if not self._valid:
+            return
+        keys = df[self._key_col].astype("str")
+        self._positions = dict(zip(keys, range(len(df))))
+        self._valid = len(self._positions) == len(df)
+        for col in self._columns:
+            self._buckets[col] = {value: set(group) for value, group in keys.groupby(df[col].astype("str"), dropna=True)}
+        for col in self._sort_columns:
+            self._sort_values[col] = dict(zip(keys, _cursor_values(df[col])))
+            self._sorted[col] = sorted((value, key) for key, value in self._sort_values[col].items())
+
+    def _index_rows(self, rows, add):
+        keys = rows[self._key_col].astype("str")
+        for col in self._columns:
+            buckets = self._buckets[col]
+            for key, value in zip(keys, rows[col].astype("str")):
+                if pd.isna(value):
+                    continue
+                if add:
+                    buckets.setdefault(value, set()).add(key)
+                elif value in buckets:
+                    buckets[value].discard(key)
+                    if not buckets[value]:
+                        del buckets[value]
+        for col in self._sort_columns:
+            entries, sort_values = self._sorted[col], self._sort_values[col]
+            for key, value in zip(keys, _cursor_values(rows[col])):
+                if add:
+                    bisect.insort(entries, (value, key))
+                    sort_values[key] = value
+                elif sort_values.get(key) == value:
+                    del entries[bisect.bisect_left(entries, (value, key))]
+                    del sort_values[key]
+
+    def apply(self, old_df, new_df, changed_keys):
+        """
+        Updates the indexes from `old_df` to `new_df`, which differ only in the rows `changed_keys`. Returns the
+        old and the new versions of those rows, or None if the indexes had to be rebuilt from `new_df`.
+        """
+        if not self._valid or any(col not in new_df.columns for col in [self._key_col] + self._columns + self._sort_columns):
+            self.rebuild(new_df)
+            return None
+        old_positions = sorted(self._positions[key] for key in changed_keys if key in self._positions)
+        old_rows = old_df.iloc[old_positions]
+        added = len(changed_keys) - len(old_positions)
+        if len(new_df) == len(old_df) + added:
+            # No row was deleted: existing rows kept their position and new ones were appended
+            self._positions.update(zip(new_df[self._key_col].iloc[len(old_df):].astype("str"), range(len(old_df), len(new_df))))
+        else:
+            self._positions = dict(zip(new_df[self._key_col].astype("str"), range(len(new_df))))
+        if len(self._positions) != len(new_df):
+            self.rebuild(new_df)
+            return None
+        new_rows = new_df.iloc[sorted(self._positions[key] for key in changed_keys if key in self._positions)]
+        self._index_rows(old_rows, add=False)
+        self._index_rows(new_rows, add=True)
+        return old_rows, new_rows
+
+    def keys(self, column, values):
+        """Returns the primary keys of the rows whose `column` is one of `values`, or None if `column` is not indexed."""
+        if not self._valid:
+            return None
+        if column == self._key_col:
+            return {value for value in values if value in self._positions}
+        if column not in self._buckets:
+            return None
+        return set().union(*(self._buckets[column].get(value, ()) for value in values))
+
+    def find(self, column, values):
+        """Returns the sorted positions of the rows whose `column` is one of `values`, or None if `column` is not indexed."""
+        keys = self.keys(column, values)
+        return None if keys is None else sorted(self._positions[key] for key in keys)
+
+    def page(self, column, filters, **page_args):
+        """
+        Pages through the rows in `column` order (see _page_entries), keeping those whose columns match
+        `filters` (column -> values). Returns the row positions, the cursors of the page and whether more rows
+        follow, or None if `column` or one of the filtered columns is not indexed.
+        """
+        if not self._valid or column not in self._sorted:
+            return None
+        entries, allowed = self._sorted[column], None
+        for col, values in filters.items():
+            keys = self.keys(col, values)
+            if keys is None:
+                return None
+            allowed = keys if allowed is None else allowed & keys
+        if allowed is not None and len(allowed) < len(entries) // 2:
+            # Few matches: sorting them is cheaper than walking the whole index past the others
+            entries, allowed = sorted((self._sort_values[column][key], key) for key in allowed), None
+        page, more = _page_entries(entries, accept=allowed.__contains__ if allowed is not None else None, **page_args)
+        return [self._positions[key] for _, key in page], page, more
+
+class TableAggregates:
+    """
+    Count and sum aggregates of one shared table, as configured in TABLE_AGGREGATES. Each one maps a group
+    value (as a string; "" when the whole table is one group) to [row count, sum]. They are computed once
+    when the table is loaded and then adjusted by the rows each write removed and added.
+    """
+    def __init__(self, df, specs):
+        self._specs = specs
+        self.rebuild(df)
+
+    def rebuild(self, df):
+        self._values = {name: {} for name in self._specs}
+        self.add(df)
+
+    def add(self, rows, sign=1):
+        """Adds `rows` to the aggregates, or subtracts them with sign=-1."""
+        if rows.empty:
+            return
+        for name, (group_col, value_col) in self._specs.items():
+            if any(col and col not in rows.columns for col in (group_col, value_col)):
+                continue
+            frame = pd.DataFrame({
+                "group": rows[group_col].astype("str") if group_col else "",
+                "value": pd.to_numeric(rows[value_col], errors="coerce") if value_col else 0,
+            }, index=rows.index)
+            groups = self._values[name]
+            for group, count, total in frame.groupby("group")["value"].agg(["size", "sum"]).itertuples():
+                entry = groups.setdefault(group, [0, 0.0])
+                entry[0] += sign * count
+                entry[1] += sign * total
+                if entry[0] <= 0:
+                    del groups[group]
+
+    def get(self, name):
+        return {group: tuple(entry) for group, entry in self._values.get(name, {}).items()}
+
+class SharedTables:
+    """
+    Process-wide, versioned copy of each table, shared by every session. Published DataFrames are never
+    modified in place: each change publishes a new frame under the next version, so sessions holding an
+    older snapshot keep a consistent view until their next run. Each published frame carries its version in
+    `df.attrs["version"]` (kept by frames derived from it), and each row key is stamped with the version that
+    last added, changed or deleted it, which lets writers based on an older snapshot detect conflicting rows.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}
+
+    def get(self, sheet_name):
+        """
+        Returns the current entry of a table as {"df", "version", "row_versions", "revision", "refreshed_at"},
+        or None if it is not loaded.
+        """
+        with self._lock:
+            return self._entries.get(sheet_name)
+
+    def stale(self, sheet_names, max_age, revision=None):
+        """
+        Returns the tables that are not loaded or were loaded at a different backend `revision`. Without a
+        revision (revision=None) that signal is missing, and tables last loaded from the backend more than
+        `max_age` seconds ago (writes don't count) are returned instead.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [
+                sheet_name for sheet_name in sheet_names
+                if sheet_name not in self._entries
+                or (revision is not None and self._entries[sheet_name]["revision"] != revision)
+                or (revision is None and now - self._entries[sheet_name]["refreshed_at"] > max_age)
+            ]
+
+    def publish(self, sheet_name, df, revision=None, changed_keys=None, reloaded=True, expected_version=None):
+        """
+        Makes `df` the current version of a table, as loaded at backend `revision`, and stamps the rows in
+        `changed_keys` with the new version; the table's indexes and aggregates are updated from those rows only. With
+        changed_keys=None (a reload or a whole-table replacement), the changed rows are found by diffing
+        against the previous version and the indexes and aggregates are rebuilt. reloaded=False marks a local
+        write, which keeps the time the table was last loaded from the backend. With an `expected_version`
+        (0 for a table not loaded yet), `df` is only published if the table is still at that version.
+        Returns True if `df` was published.
+        """
+        with self._lock:
+            previous = self._entries.get(sheet_name)
+            if expected_version is not None and (previous["version"] if previous else 0) != expected_version:
+                return False
+            version = previous["version"] + 1 if previous else 1
+            row_versions = dict(previous["row_versions"]) if previous else {}
+            key_col = SHEET_PRIMARY_KEYS.get(sheet_name)
+            if changed_keys is None:
+                changed_keys = set()
+                if previous and key_col:
+                    diff = diff_dataframes(previous["df"], df, key_col)
+                    if diff is None:
+                        # Not diffable row by row: treat every row as changed
+                        changed_keys |= set(row_versions)
+                        for frame in (previous["df"], df):
+                            if key_col in frame.columns:
+                                changed_keys |= set(frame[key_col].dropna().astype(str))
+                    else:
+                        changed_keys |= {key for key, _ in diff["changed_cells"]}
+                        changed_keys |= set(diff["added"][key_col].astype(str)) | set(diff["deleted"])
+                indexes = TableIndexes(df, key_col, SECONDARY_INDEXES.get(sheet_name, []), SORTED_INDEXES.get(sheet_name, []))
+                aggregates = TableAggregates(df, TABLE_AGGREGATES.get(sheet_name, {}))
+            else:
+                indexes, aggregates = previous["indexes"], previous["aggregates"]
+                changed_rows = indexes.apply(previous["df"], df, changed_keys)
+                if changed_rows is None:
+                    aggregates.rebuild(df)
+                else:
+                    aggregates.add(changed_rows[0], sign=-1)
+                    aggregates.add(changed_rows[1])
+            row_versions.update(dict.fromkeys(changed_keys, version))
+            df = df.copy(deep=False)
+            df.attrs["table"] = sheet_name
+            df.attrs["version"] = version
+            self._entries[sheet_name] = {
+                "df": df,
+                "version": version,
+                "row_versions": row_versions,
+                "indexes": indexes,
+                "aggregates": aggregates,
+                "revision": revision,
+                "refreshed_at": previous["refreshed_at"] if previous and not reloaded else time.monotonic(),
+            }
+            return True
+
+    def update(self, sheet_name, change_fn, keys=None, base_version=None):
+        """
+        Publishes `change_fn(current_df, conflicts)` as the next version of a table, atomically with respect to
+        other writers (compare-and-swap on the rows `keys`). With a `base_version`, the keys stamped with a later
+        version were changed by someone else since and are passed in `conflicts`; `change_fn` must leave them out,
+        and may add keys it rejects itself. The other keys are stamped with the new version. keys=None means
+        the change may touch any row (no conflict check). Returns the conflicts.
+        """
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            row_versions = entry["row_versions"] if entry else {}
+            conflicts = set()
+            if keys is not None and base_version is not None:
+                conflicts = {key for key in keys if row_versions.get(key, 0) > base_version}
+            df = change_fn(entry["df"] if entry else pd.DataFrame(), conflicts)
+            changed_keys = set(keys) - conflicts if keys is not None and entry else None
+            self.publish(sheet_name, df, entry["revision"] if entry else None, changed_keys, reloaded=False)
+            return conflicts
+
+    def aggregate(self, sheet_name, name):
+        """Returns the current value of an aggregate of TABLE_AGGREGATES: group -> (row count, sum)."""
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            return entry["aggregates"].get(name) if entry else {}
+
+    def _indexes(self, df):
+        entry = self._entries.get(df.attrs.get("table"))
+        # Filtered or reordered frames keep the attrs of the table they came from, but not its row positions
+        if entry is None or entry["version"] != df.attrs.get("version") or not df.index.equals(entry["df"].index):
+            return None
+        return entry["indexes"]
+
+    def find(self, df, column, values):
+        """
+        Returns the positions, in table order, of the rows of `df` whose `column` is one of `values` (strings),
+        using the indexes of the table `df` is a version of. Returns None if `df` is not the current version
+        of a table or `column` is not indexed; the caller then has to scan.
+        """
+        with self._lock:
+            indexes = self._indexes(df)
+            return indexes.find(column, values) if indexes else None
+
+    def page(self, df, column, filters, **page_args):
+        """Pages through the rows of `df` with the indexes of its table (see TableIndexes.page); None if they cannot be used."""
+        with self._lock:
+            indexes = self._indexes(df)
+            return indexes.page(column, filters, **page_args) if indexes else None
+
+@st.cache_resource
+def get_shared_tables():
+    """Returns the SharedTables holding the one in-memory copy of each table for the whole process."""
+    return SharedTables()
+
+# Prefix of the generated IDs of each table ("T" + number -> "T042")
+ID_PREFIXES = {"announcements": "A", "tasks": "T", "registrations": "R"}
+
+class IdAllocator:
+    """
+    Hands out monotonic, never reused IDs for new rows, per table. Numbers are reserved from the storage
+    backend's shared counter in blocks of `block_size` (SQLite's id_counters table, Google Sheets' id_reservations
+    worksheet), so most allocations are an in-memory increment and no two processes get the same ID. The first
+    block of a process also starts above the highest ID in the table. If the backend keeps no counter or the
+    reservation fails, the process numbers on from that floor for one block and tries the counter again after it.
+    """
+    def __init__(self, block_size=20):
+        self._block_size = block_size
+        self._lock = threading.Lock()
+        self._blocks = {} # Sheet name -> [next number, end of the reserved block]
+
+    @staticmethod
+    def highest_number(df, key_col, prefix):
+        """Returns the highest number used by the `prefix` IDs in `df` (0 if there are none)."""
+        if df.empty or key_col not in df.columns:
+            return 0
+        numbers = pd.to_numeric(df[key_col].astype("str").str.extract(rf"^{re.escape(prefix)}(\d+)$", expand=False), errors="coerce")
+        return int(numbers.max()) if numbers.notna().any() else 0
+
+    def next_id(self, store, sheet_name):
+        """Returns a new ID for a row of `sheet_name`. `store` provides the table and the backend's counter."""
+        prefix = ID_PREFIXES[sheet_name]
+        with self._lock:
+            block = self._blocks.get(sheet_name)
+            if block is None or block[0] >= block[1]:
+                if block is None: # First ID of this process: start above the IDs already in the table
+                    floor = self.highest_number(store.read_sheet(sheet_name), SHEET_PRIMARY_KEYS[sheet_name], prefix)
+                else:
+                    floor = block[1] - 1
+                first = store.reserve_ids(sheet_name, self._block_size, floor)
+                if first is None: # Without the shared counter this block numbers on from `floor`, unaware of other processes
+                    first = floor + 1
+                block = [first, first + self._block_size]
+                self._blocks[sheet_name] = block
+            number = block[0]
+            block[0] += 1
+        return f"{prefix}{number:03d}"
+
+@st.cache_resource
+def get_id_allocator():
+    """Returns the IdAllocator shared by all sessions of the process."""
+    return IdAllocator()
+
+class DataStore(StorageBackend):
+    """
+    Storage facade used by the pages. Reads are served from the shared in-memory tables, which are loaded
+    from `backend` on first use and reloaded when the backend's revision signal reports an outside change, or,
+    while the backend gives no revision, `max_age` seconds after they were last loaded. Writes are applied to the shared copy first and
+    then passed on to `backend`.
+
+    Writes are optimistic: rows derived from a snapshot returned by read_sheets carry its version, and rows
+    that someone else changed after that version are rejected instead of overwriting the newer values (the
+    other rows of the write still go through). The write methods return the keys of the rejected rows.
+    """
+    def __init__(self, backend, max_age=300):
+        self._backend = backend
+        self._tables = get_shared_tables()
+        self._ids = get_id_allocator()
+        self._max_age = max_age
+
+    @staticmethod
+    def _appended(df, rows):
+        return pd.concat([df, rows], ignore_index=True) if not df.empty else rows.reset_index(drop=True)
+
+    @classmethod
+    def _upserted(cls, df, key_col, rows):
+        """Returns `df` with the rows of `rows` replacing those with the same `key_col` value; unmatched rows are appended."""
+        if df.empty or key_col not in df.columns:
+            return cls._appended(df, rows)
+        rows = rows.drop_duplicates(subset=key_col, keep="last")
+        updates = rows.set_index(rows[key_col].astype(str))
+        keys = df[key_col].astype(str)
+        matched = keys.isin(updates.index)
+        updated = df[matched].copy()
+        for col in rows.columns:
+            # Whole-column assignment, so a value of a different dtype does not fail the update
+            updated[col] = keys[matched].map(updates[col])
+        result = pd.concat([df[~matched], updated]).sort_index()
+        return cls._appended(result, rows[~rows[key_col].astype(str).isin(keys[matched])]).reset_index(drop=True)
+
+    @staticmethod
+    def _without(df, key_col, keys):
+        if df.empty or key_col not in df.columns:
+            return df
+        return df[~df[key_col].astype(str).isin({str(key) for key in keys})].reset_index(drop=True)
+
+    def read_sheets(self, sheet_names):
+        """
+        Returns the current shared snapshot of each table, loading stale ones from the backend in one batch.
+        If the backend cannot be read, the tables already loaded are served as they are and the others come
+        back empty without being published, so the next read tries the backend again.
+
+        A reload is only published if no write changed the table while it was being read, and tables with
+        writes the backend has not applied yet are not reloaded; either would bring back the old rows.
+        """
+        sheet_names = list(sheet_names)
+        revision = self._backend.revision() # Cheap check; rows are downloaded only for tables it reports as changed
+        stale_sheets = [
+            sheet_name for sheet_name in self._tables.stale(sheet_names, self._max_age, revision)
+            if not (self.version(sheet_name) and self._backend.has_pending_writes(sheet_name))
+        ]
+        if stale_sheets:
+            versions = {sheet_name: self.version(sheet_name) for sheet_name in stale_sheets}
+            try:
+                loaded = self._backend.read_sheets(stale_sheets)
+            except StorageReadError as e:
+                print(f"--- LOAD FAILED FOR {', '.join(stale_sheets)}, SERVING THE LOADED COPIES ---\n{e}")
+                loaded = {}
+            for sheet_name, df in loaded.items():
+                self._tables.publish(sheet_name, df, revision, expected_version=versions[sheet_name])
+        entries = {sheet_name: self._tables.get(sheet_name) for sheet_name in sheet_names}
+        return {sheet_name: entry["df"] if entry else pd.DataFrame() for sheet_name, entry in entries.items()}
+
+    def read_sheet(self, sheet_name):
+        return self.read_sheets([sheet_name])[sheet_name]
+
+    def _require_loaded(self, sheet_name):
+        """Makes sure the table is loaded and fresh; raises StorageReadError if it was never loaded and the backend cannot be read."""
+        self.read_sheet(sheet_name)
+        if self._tables.get(sheet_name) is None:
+            raise StorageReadError(f"Table '{sheet_name}' could not be loaded, so it cannot be changed right now. Please try again in a moment.")
+
+    def version(self, sheet_name):
+        """Returns the version of the shared copy of a table (0 if it is not loaded)."""
+        entry = self._tables.get(sheet_name)
+        return entry["version"] if entry else 0
+
+    def rows(self, df, column, *values):
+        """
+        Returns the rows of `df` whose `column` is one of `values`, in table order. Uses the secondary indexes
+        when `df` is the current shared copy of a table and `column` is indexed, and scans otherwise.
+        """
+        if df.empty or column not in df.columns:
+            return df.iloc[0:0]
+        values = {str(value) for value in values}
+        positions = self._tables.find(df, column, values)
+        if positions is None:
+            return df[df[column].astype("str").isin(values)]
+        return df.iloc[positions]
+
+    def page(self, df, column, limit=None, after=None, until=None, filters=None, descending=True):
+        """
+        Returns one page of the rows of `df` in `column` order, from the cursor `after` (exclusive) to the cursor
+        `until` (inclusive) and at most `limit` rows, keeping the rows whose columns match `filters` (column ->
+        values). Cursors are the (value, key) pairs of rows, so pages stay put when rows are added or removed
+        elsewhere. Only the rows of the page are materialized. Returns (rows, cursor of the last row, more rows follow).
+        """
+        if df.empty or column not in df.columns:
+            return df.iloc[0:0], after, False
+        filters = {col: {str(value) for value in values} for col, values in (filters or {}).items()}
+        page_args = dict(limit=limit, after=after, until=until, descending=descending)
+        result = self._tables.page(df, column, filters, **page_args)
+        if result is None:
+            rows = df
+            for col, values in filters.items():
+                rows = rows[rows[col].astype("str").isin(values)] if col in rows.columns else rows.iloc[0:0]
+            key_col = SHEET_PRIMARY_KEYS.get(df.attrs.get("table"))
+            keys = rows[key_col].astype("str") if key_col in rows.columns else rows.index.astype("str")
+            positions = dict(zip(keys, range(len(rows))))
+            page, more = _page_entries(sorted(zip(_cursor_values(rows[column]), keys)), **page_args)
+            return rows.iloc[[positions[key] for _, key in page]], page[-1] if page else after, more
+        positions, page, more = result
+        return df.iloc[positions], page[-1] if page else after, more
+
+    def aggregate(self, sheet_name, name):
+        """Returns an aggregate of TABLE_AGGREGATES over the current shared copy of a table, as group -> (row count, sum)."""
+        self.read_sheet(sheet_name) # Make sure the table is loaded and fresh
+        return self._tables.aggregate(sheet_name, name)
+
+    def total(self, sheet_name, name):
+        """Returns the sum of an ungrouped aggregate of TABLE_AGGREGATES (0 for an empty table)."""
+        return self.aggregate(sheet_name, name).get("", (0, 0))[1]
+
+    @staticmethod
+    def _keys(key_col, df):
+        return set(df[key_col].dropna().astype(str)) if key_col in df.columns else set()
+
+    def _apply(self, sheet_name, change_fn, keys=None, base_version=None):
+        """
+        Applies `change_fn(current_df, conflicts)` to the shared copy of a table as a compare-and-swap on the rows
+        `keys`, or as a whole-table replacement if keys=None (see SharedTables.update), and warns about the
+        rejected rows. Their current values are already in the shared copy, so only those rows need to be redone.
+        Returns the rejected keys.
+        """
+        self._require_loaded(sheet_name) # Changes are applied to the loaded copy, never to a placeholder
+        # The write methods cast the rows they are given; fix up the columns merging them changed the dtype of
+        rejected = self._tables.update(
+            sheet_name, lambda current, conflicts: conform_schema(sheet_name, change_fn(current, conflicts)), keys, base_version
+        )
+        if rejected:
+            st.warning(f"{len(rejected)} row(s) of '{sheet_name}' were changed by someone else in the meantime and were not saved: "
+                       f"{', '.join(sorted(rejected))}. The latest data is shown now, please redo those changes. 🔄")
+        return rejected
+
+    def save_dataframe(self, sheet_name, df):
+        """Replaces the whole table with `df`, unconditionally."""
+        df = apply_schema(sheet_name, df)
+        self._apply(sheet_name, lambda current, conflicts: df.reset_index(drop=True))
+        self._backend.save_dataframe(sheet_name, df)
+        return set()
+
+    def append_rows(self, sheet_name, df):
+        """Appends the rows of `df`; rows whose key is already taken (e.g. by a concurrent insert) are rejected."""
+        if df.empty:
+            return set()
+        df = apply_schema(sheet_name, df) # Only the new rows are cast, not the whole table
+        key_col = SHEET_PRIMARY_KEYS.get(sheet_name)
+        keys = self._keys(key_col, df)
+
+        def change(current, conflicts):
+            conflicts |= keys & self._keys(key_col, current) # Already taken
+            return self._appended(current, self._without(df, key_col, conflicts))
+        rejected = self._apply(sheet_name, change, keys)
+        rows = self._without(df, key_col, rejected)
+        if not rows.empty:
+            self._backend.append_rows(sheet_name, rows)
+        return rejected
+
+    def update_rows(self, sheet_name, key_col, df, base_version=None):
+        """Upserts the rows of `df`, rejecting those changed since `base_version` (by default the version `df` was derived from)."""
+        if df.empty:
+            return set()
+        keys = None
+        if key_col == SHEET_PRIMARY_KEYS.get(sheet_name): # Row versions are tracked by primary key only
+            keys = self._keys(key_col, df)
+            base_version = base_version if base_version is not None else df.attrs.get("version")
+        else:
+            base_version = None
+        df = apply_schema(sheet_name, df) # Only the given rows are cast, not the whole table
+        rejected = self._apply(
+            sheet_name, lambda current, conflicts: self._upserted(current, key_col, self._without(df, key_col, conflicts)), keys, base_version
+        )
+        rows = self._without(df, key_col, rejected)
+        if not rows.empty:
+            self._backend.update_rows(sheet_name, key_col, rows)
+        return rejected
+
+    def delete_rows(self, sheet_name, key_col, keys, base_version=None):
+        """Deletes the rows whose `key_col` value is in `keys`, keeping those changed since `base_version`."""
+        keys = {str(key) for key in keys}
+        if not keys:
+            return set()
+        if key_col != SHEET_PRIMARY_KEYS.get(sheet_name): # Row versions are tracked by primary key only
+            rejected = self._apply(sheet_name, lambda current, conflicts: self._without(current, key_col, keys))
+        else:
+            rejected = self._apply(sheet_name, lambda current, conflicts: self._without(current, key_col, keys - conflicts), keys, base_version)
+        if keys - rejected:
+            self._backend.delete_rows(sheet_name, key_col, sorted(keys - rejected))
+        return rejected
+
+    def reserve_ids(self, sheet_name, count, floor):
+        return self._backend.reserve_ids(sheet_name, count, floor)
+
+    def new_id(self, sheet_name):
+        """Returns a fresh, unused ID for a new row of `sheet_name` (one of ID_PREFIXES)."""
+        self._require_loaded(sheet_name) # Numbering starts above the IDs in the table
+        return self._ids.next_id(self, sheet_name)
@@ -0,0 +1,77 @@
+"""Tests of the ID blocks reserved through the Google Sheets id_reservations worksheet."""
+import gspread
+import pandas as pd
+
+from erp.sheets import GoogleSheetDB
+from erp.storage import IdAllocator
+
+class LogWorksheet:
+    """Stands in for the id_reservations worksheet: appended rows, read back as strings like Sheets returns them."""
+    title = GoogleSheetDB.ID_RESERVATIONS_SHEET
+
+    def __init__(self):
+        self.rows = [["Sheet Name", "Count", "Floor"]]
+
+    def update(self, values, range_name):
+        self.rows[:len(values)] = values
+
+    def append_rows(self, values, **kwargs):
+        self.rows.extend(values)
+        return {"updates": {"updatedRange": f"'{self.title}'!A{len(self.rows)}:C{len(self.rows)}"}}
+
+    def get(self, range_name):
+        last_row = int(range_name.split(":C")[1])
+        return [[str(value) for value in row] for row in self.rows[1:last_row]]
+
+class Spreadsheet:
+    """A spreadsheet without the id_reservations worksheet until reserve_ids adds it."""
+    def __init__(self):
+        self.log = None
+
+    def worksheets(self):
+        return [self.log] if self.log is not None else []
+
+    def add_worksheet(self, title, rows, cols):
+        self.log = LogWorksheet()
+        return self.log
+
+    def get_lastUpdateTime(self):
+        return "2025-01-01T00:00:00Z"
+
+class Store:
+    """What IdAllocator needs of a DataStore: the table and the backend's counter."""
+    def __init__(self, backend, task_ids):
+        self.backend = backend
+        self.tasks = pd.DataFrame({"Task ID": task_ids})
+
+    def read_sheet(self, sheet_name):
+        return self.tasks
+
+    def reserve_ids(self, sheet_name, count, floor):
+        return self.backend.reserve_ids(sheet_name, count, floor)
+
+def test_processes_sharing_a_spreadsheet_get_disjoint_blocks():
+    spreadsheet = Spreadsheet()
+    db = GoogleSheetDB("test-id-reservations", gspread_enabled=True, spreadsheet=spreadsheet)
+    assert db.reserve_ids("tasks", 20, 3) == 4
+    assert db.reserve_ids("registrations", 20, 0) == 1
+    assert db.reserve_ids("tasks", 20, 3) == 24 # A second process that saw the same table
+    assert db.reserve_ids("tasks", 20, 50) == 51 # Rows added by hand above the counter
+    assert db.reserve_ids("tasks", 20, 3) == 71
+    assert spreadsheet.log.rows[0] == ["Sheet Name", "Count", "Floor"]
+
+def test_ids_are_not_reused_after_the_top_row_is_deleted_and_the_process_restarts():
+    db = GoogleSheetDB("test-id-restart", gspread_enabled=True, spreadsheet=Spreadsheet())
+    store = Store(db, ["T001", "T002"])
+    assert IdAllocator(block_size=2).next_id(store, "tasks") == "T003"
+    # T003 was never saved, or deleted again: a new process's allocator starts from the same table
+    assert IdAllocator(block_size=2).next_id(store, "tasks") == "T005"
+
+def test_allocator_numbers_on_from_the_table_when_the_reservation_fails(monkeypatch):
+    db = GoogleSheetDB("test-id-failure", gspread_enabled=True, spreadsheet=Spreadsheet())
+    def fail(*args, **kwargs):
+        raise gspread.exceptions.GSpreadException("quota")
+    monkeypatch.setattr(LogWorksheet, "append_rows", fail)
+    allocator = IdAllocator(block_size=2)
+    store = Store(db, ["T007"])
+    assert [allocator.next_id(store, "tasks") for _ in range(3)] == ["T008", "T009", "T010"]
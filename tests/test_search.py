@@ -0,0 +1,28 @@
+"""Tests of the shared event search index."""
+import pandas as pd
+
+from erp.search import EventSearchIndex
+
+def events(*rows):
+    df = pd.DataFrame([{"Event ID": event_id, "Name": name, "Location": location} for event_id, name, location in rows])
+    df.attrs["version"] = 7
+    return df
+
+def test_search_ranks_name_matches_and_prefixes():
+    index = EventSearchIndex()
+    df = events(("E1", "Robotics Expo", "Hall A"), ("E2", "Dance Night", "Robo Lab"), ("E3", "Quiz", "Hall B"))
+    assert index.search(df, "robo")["Event ID"].tolist() == ["E1", "E2"]
+    assert index.search(df, "hall quiz")["Event ID"].tolist() == ["E3"]
+    assert index.search(df, "missing").empty
+
+def test_filtered_frame_of_the_same_version_is_not_served_from_the_full_table_index():
+    index = EventSearchIndex()
+    df = events(("E1", "Robotics Expo", "Hall A"), ("E2", "Dance Night", "Hall B"), ("E3", "Robot Wars", "Hall C"))
+    assert index.search(df, "robot")["Event ID"].tolist() == ["E3", "E1"]
+
+    # Filtering keeps the version in attrs, but the row positions of the full table no longer apply
+    filtered = df[df["Event ID"] != "E1"]
+    assert filtered.attrs["version"] == 7
+    assert index.search(filtered, "robot")["Event ID"].tolist() == ["E3"]
+    assert index.search(filtered.iloc[:1], "robot").empty
+    assert index.search(df, "robot")["Event ID"].tolist() == ["E3", "E1"]
@@ -0,0 +1,134 @@
+"""Tests of the shared in-memory tables behind DataStore: indexes, aggregates, paging and conflict checks."""
+import datetime
+
+import pandas as pd
+import pytest
+
+from erp.storage import DataStore, IdAllocator, SharedTables, StorageBackend
+
+class MemoryBackend(StorageBackend):
+    """Backend holding fixed tables; writes are accepted and dropped, as DataStore serves reads from its shared copy."""
+    def __init__(self, tables):
+        self._tables = tables
+
+    def read_sheet(self, sheet_name):
+        return self._tables.get(sheet_name, pd.DataFrame()).copy()
+
+    def save_dataframe(self, sheet_name, df):
+        pass
+
+    def append_rows(self, sheet_name, df):
+        pass
+
+    def update_rows(self, sheet_name, key_col, df):
+        pass
+
+    def delete_rows(self, sheet_name, key_col, keys):
+        pass
+
+def registration(number, participant, event_id, day):
+    return {"Reg ID": f"R{number:03d}", "Participant Username": participant, "Event ID": event_id,
+            "Registration Date": datetime.date(2025, 1, day)}
+
+@pytest.fixture
+def store():
+    registrations = pd.DataFrame([registration(i, f"p{i % 3}", f"E{i % 4}", i % 28 + 1) for i in range(1, 41)])
+    store = DataStore(MemoryBackend({"registrations": registrations}))
+    # Each test gets its own tables instead of the process-wide ones
+    store._tables = SharedTables()
+    store._ids = IdAllocator()
+    return store
+
+def assert_indexes_match_a_scan(store, sheet_name="registrations"):
+    df = store.read_sheet(sheet_name)
+    for col in ["Participant Username", "Event ID"]:
+        for value in df[col].dropna().unique():
+            scanned = df[df[col] == value]
+            assert store.rows(df, col, value)["Reg ID"].tolist() == scanned["Reg ID"].tolist()
+    assert store.rows(df, "Event ID", "E-missing").empty
+
+def test_indexes_follow_appends_updates_and_deletes(store):
+    assert_indexes_match_a_scan(store)
+    assert store.append_rows("registrations", pd.DataFrame([registration(100, "p9", "E9", 5), registration(101, "p0", "E1", 6)])) == set()
+    assert_indexes_match_a_scan(store)
+
+    df = store.read_sheet("registrations")
+    moved = df[df["Reg ID"].isin(["R001", "R002", "R100"])].assign(**{"Event ID": "E7"})
+    assert store.update_rows("registrations", "Reg ID", moved) == set()
+    assert_indexes_match_a_scan(store)
+    assert set(store.rows(store.read_sheet("registrations"), "Event ID", "E7")["Reg ID"]) == {"R001", "R002", "R100"}
+
+    assert store.delete_rows("registrations", "Reg ID", ["R003", "R100", "R040"]) == set()
+    assert_indexes_match_a_scan(store)
+    assert store.rows(store.read_sheet("registrations"), "Participant Username", "p9").empty
+
+def assert_aggregates_match_a_rebuild(store, sheet_name="registrations"):
+    df = store.read_sheet(sheet_name)
+    counts = df.groupby("Event ID").size()
+    assert store.aggregate(sheet_name, "per_event") == {event_id: (count, 0.0) for event_id, count in counts.items()}
+    rebuilt = SharedTables()
+    rebuilt.publish(sheet_name, df.reset_index(drop=True))
+    assert store.aggregate(sheet_name, "per_participant") == rebuilt.aggregate(sheet_name, "per_participant")
+
+def test_aggregates_follow_appends_updates_and_deletes(store):
+    assert_aggregates_match_a_rebuild(store)
+    store.append_rows("registrations", pd.DataFrame([registration(100, "p9", "E9", 5), registration(101, "p0", "E1", 6)]))
+    assert_aggregates_match_a_rebuild(store)
+
+    df = store.read_sheet("registrations")
+    store.update_rows("registrations", "Reg ID", df[df["Reg ID"].isin(["R001", "R002", "R100"])].assign(**{"Event ID": "E7"}))
+    assert_aggregates_match_a_rebuild(store)
+
+    store.delete_rows("registrations", "Reg ID", ["R003", "R100", "R040"])
+    assert_aggregates_match_a_rebuild(store)
+    assert "E9" not in store.aggregate("registrations", "per_event")
+
+def test_paging_resumes_from_cursor_across_deletes(store):
+    df = store.read_sheet("registrations")
+    first_page, cursor, more = store.page(df, "Registration Date", limit=10)
+    assert more and len(first_page) == 10
+
+    # Delete a row already shown and rows not shown yet, then page on from the cursor over the new snapshot
+    not_shown = df[~df["Reg ID"].isin(first_page["Reg ID"])]
+    deleted = {first_page["Reg ID"].iloc[0], *not_shown["Reg ID"].iloc[:3]}
+    store.delete_rows("registrations", "Reg ID", deleted)
+    df = store.read_sheet("registrations")
+    seen = list(first_page["Reg ID"])
+    while more:
+        rows, cursor, more = store.page(df, "Registration Date", limit=10, after=cursor)
+        seen.extend(rows["Reg ID"])
+
+    assert len(seen) == len(set(seen))
+    assert set(seen) == set(df["Reg ID"]) | {first_page["Reg ID"].iloc[0]}
+    dates = [value for value in pd.concat([first_page, df.set_index("Reg ID").loc[seen[10:]].reset_index()])["Registration Date"]]
+    assert dates == sorted(dates, reverse=True)
+
+def test_filtered_paging_matches_a_scan(store):
+    df = store.read_sheet("registrations")
+    rows, _, more = store.page(df, "Registration Date", filters={"Event ID": ["E1"]})
+    assert not more
+    assert set(rows["Reg ID"]) == set(df[df["Event ID"] == "E1"]["Reg ID"])
+
+def test_update_from_a_stale_snapshot_rejects_only_rows_changed_since(store):
+    snapshot = store.read_sheet("registrations")
+    other = snapshot[snapshot["Reg ID"] == "R001"].assign(**{"Event ID": "E-other"})
+    assert store.update_rows("registrations", "Reg ID", other) == set()
+
+    mine = snapshot[snapshot["Reg ID"].isin(["R001", "R002"])].assign(**{"Event ID": "E-mine"})
+    assert store.update_rows("registrations", "Reg ID", mine) == {"R001"}
+    current = store.read_sheet("registrations").set_index("Reg ID")["Event ID"]
+    assert current["R001"] == "E-other"
+    assert current["R002"] == "E-mine"
+
+def test_delete_from_a_stale_snapshot_keeps_rows_changed_since(store):
+    snapshot = store.read_sheet("registrations")
+    store.update_rows("registrations", "Reg ID", snapshot[snapshot["Reg ID"] == "R005"].assign(**{"Event ID": "E3"}))
+    assert store.delete_rows("registrations", "Reg ID", ["R005", "R006"], base_version=snapshot.attrs["version"]) == {"R005"}
+    assert set(store.read_sheet("registrations")["Reg ID"]) & {"R005", "R006"} == {"R005"}
+
+def test_append_rejects_keys_already_taken(store):
+    rows = pd.DataFrame([registration(1, "p7", "E1", 1), registration(200, "p7", "E1", 1)])
+    assert store.append_rows("registrations", rows) == {"R001"}
+    df = store.read_sheet("registrations")
+    assert df[df["Reg ID"] == "R001"]["Participant Username"].tolist() == ["p1"]
+    assert "R200" in set(df["Reg ID"])
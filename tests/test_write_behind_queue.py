@@ -0,0 +1,110 @@
+"""Tests of the Google Sheets write-behind queue: coalescing and the order of retried writes."""
+import pandas as pd
+import pytest
+
+from erp.sheets import WriteBehindQueue
+
+class RecordingWriter:
+    """Stands in for the GoogleSheetDB the queue writes through; `failures` lists the calls (method, sheet) that fail once."""
+    def __init__(self, failures=()):
+        self.calls = []
+        self.failures = list(failures)
+        self.recorded_own_writes = 0
+
+    def _record(self, method, sheet_name, *args):
+        if (method, sheet_name) in self.failures:
+            self.failures.remove((method, sheet_name))
+            raise RuntimeError("API error")
+        self.calls.append((method, sheet_name, *args))
+
+    def revision(self):
+        return None
+
+    def record_own_writes(self):
+        self.recorded_own_writes += 1
+
+    def __getattr__(self, method):
+        return lambda sheet_name, *args: self._record(method, sheet_name, *args)
+
+@pytest.fixture
+def make_queue():
+    # A long window keeps the worker thread from flushing on its own; the tests call flush() themselves
+    return lambda writer: WriteBehindQueue(writer, window=3600)
+
+def rows(*pairs):
+    return pd.DataFrame([{"Task ID": key, "Status": status} for key, status in pairs])
+
+def test_consecutive_writes_are_coalesced(make_queue):
+    writer = RecordingWriter()
+    queue = make_queue(writer)
+    queue.submit("update_rows", "tasks", "Task ID", rows(("T1", "a"), ("T2", "a")))
+    queue.submit("update_rows", "tasks", "Task ID", rows(("T1", "b")))
+    queue.submit("append_rows", "tasks", rows(("T3", "new")))
+    queue.submit("append_rows", "tasks", rows(("T4", "new")))
+    queue.submit("delete_rows", "tasks", "Task ID", {"T2"})
+    queue.submit("delete_rows", "tasks", "Task ID", {"T3"})
+    queue.flush()
+
+    assert [call[0] for call in writer.calls] == ["update_rows", "append_rows", "delete_rows"]
+    assert writer.calls[0][3].set_index("Task ID")["Status"].to_dict() == {"T1": "b", "T2": "a"}
+    assert writer.calls[1][2]["Task ID"].tolist() == ["T3", "T4"]
+    assert sorted(writer.calls[2][3]) == ["T2", "T3"]
+    assert queue.stats()["queue_depth"] == 0
+    assert writer.recorded_own_writes == 1 # One modifiedTime fetch for the whole flush
+
+def test_full_rewrite_supersedes_earlier_writes(make_queue):
+    writer = RecordingWriter()
+    queue = make_queue(writer)
+    queue.submit("append_rows", "tasks", rows(("T1", "a")))
+    queue.submit("save_dataframe", "tasks", rows(("T2", "b")))
+    queue.submit("append_rows", "tasks", rows(("T3", "c")))
+    queue.flush()
+    assert [call[0] for call in writer.calls] == ["save_dataframe", "append_rows"]
+
+def test_submitted_frames_are_copied(make_queue):
+    writer = RecordingWriter()
+    queue = make_queue(writer)
+    df = rows(("T1", "a"))
+    queue.submit("append_rows", "tasks", df)
+    df.loc[0, "Status"] = "changed"
+    queue.flush()
+    assert writer.calls[0][2]["Status"].tolist() == ["a"]
+
+def test_failed_write_holds_back_later_writes_of_its_sheet_only(make_queue):
+    writer = RecordingWriter(failures=[("append_rows", "tasks")])
+    queue = make_queue(writer)
+    queue.submit("append_rows", "tasks", rows(("T1", "a")))
+    queue.submit("delete_rows", "tasks", "Task ID", {"T1"})
+    queue.submit("append_rows", "events", pd.DataFrame([{"Event ID": "E1"}]))
+    queue.flush()
+
+    assert writer.calls == [("append_rows", "events", writer.calls[0][2])]
+    assert queue.stats()["queue_depth"] == 2
+    assert writer.recorded_own_writes == 1
+
+    # Writes queued meanwhile go after the retried ones, so the delete still follows the append
+    queue.submit("append_rows", "tasks", rows(("T9", "b")))
+    queue.flush()
+    assert [(call[0], call[1]) for call in writer.calls[1:]] == [
+        ("append_rows", "tasks"), ("delete_rows", "tasks"), ("append_rows", "tasks")
+    ]
+    assert writer.calls[1][2]["Task ID"].tolist() == ["T1"]
+    assert writer.calls[3][2]["Task ID"].tolist() == ["T9"]
+
+def test_dropped_write_is_reported_to_the_writer_and_in_stats(make_queue):
+    writer = RecordingWriter(failures=[("append_rows", "tasks")] * WriteBehindQueue.MAX_ATTEMPTS)
+    queue = make_queue(writer)
+    queue.submit("append_rows", "tasks", rows(("T1", "a")))
+    queue.submit("delete_rows", "tasks", "Task ID", {"T5"})
+    for _ in range(WriteBehindQueue.MAX_ATTEMPTS):
+        queue.flush()
+
+    # The writer is told so it reloads the sheet, whose shared copy still has the row that was never written
+    assert [call[:2] for call in writer.calls] == [("write_lost", "tasks"), ("delete_rows", "tasks")]
+    assert writer.recorded_own_writes == 1 # Only the last flush wrote anything
+    stats = queue.stats()
+    assert stats["writes_failed"] == 1
+    assert stats["queue_depth"] == 0
+    assert [(lost["sheet_name"], lost["method"], lost["attempts"]) for lost in stats["lost_writes"]] == [
+        ("tasks", "append_rows", WriteBehindQueue.MAX_ATTEMPTS)
+    ]